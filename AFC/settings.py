@@ -16,6 +16,9 @@ ALLOWED_HOSTS = ["*"]
 # Application definition
 RAZORPAY_KEY_ID = env('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = env('RAZORPAY_KEY_SECRET')
+# 'razorpay' talks to the real API, 'fake' uses core.payments.FakeRazorpayClient
+PAYMENT_GATEWAY = env('PAYMENT_GATEWAY', default='razorpay')
+RAZORPAY_POOL_SIZE = 10
 
 INSTALLED_APPS = [
     'jet',
@@ -25,12 +28,14 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'core',
     'users',
     'crispy_forms',
     'crispy_bootstrap5',
     'social_django',
+    'rest_framework',
 ]
 SOCIALACCOUNT_PROVIDERS = {
     'google': {
@@ -49,10 +54,12 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,19 +68,39 @@ ROOT_URLCONF = 'AFC.urls'
 
 AUTHENTICATION_BACKENDS = (
     'social_core.backends.google.GoogleOAuth2',
-    'django.contrib.auth.backends.ModelBackend',
-    'users.backend.EmailOrUsernameModelBackend',  # Path to your custom backend
-    'django.contrib.auth.backends.ModelBackend',        # Fallback (optional)
+    'users.backend.EmailOrUsernameModelBackend',  # Email or username, one lookup per attempt
 )
 
+# Failed logins allowed per identifier / per IP before the backend refuses
+# to check passwords for LOGIN_ATTEMPTS_WINDOW seconds
+LOGIN_ATTEMPTS_PER_IDENTIFIER = 5
+LOGIN_ATTEMPTS_PER_IP = 20
+LOGIN_ATTEMPTS_WINDOW = 60 * 5
+# request.META key the per-IP limit reads the client address from. Behind a
+# reverse proxy REMOTE_ADDR is the proxy for every client, so set this to the
+# header the proxy writes (e.g. HTTP_X_REAL_IP), or to '' to turn it off.
+LOGIN_ATTEMPTS_IP_HEADER = env('LOGIN_ATTEMPTS_IP_HEADER', default='REMOTE_ADDR')
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Sessions are read from the cache and only fall back to the database on a miss.
+# This needs a cache every process shares; see the CACHES section below.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Logging in again ends the user's previous session (see users.middleware)
+SINGLE_SESSION_PER_USER = True
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],  # Directory for custom templates
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory in development too
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -111,6 +138,50 @@ DATABASES = {
     }
 }
 
+# Cache
+# The default is a file cache under BASE_DIR so every process on the host
+# (web workers, run_jobs, import_menu) sees the same catalog version, sessions
+# and cart state. Point CACHE_URL at redis://... when running on several hosts.
+# A locmemcache:// URL is only safe with a single process that does all the
+# writes itself: bumps made by commands and jobs never reach it.
+CACHES = {
+    'default': env.cache('CACHE_URL', default=f'filecache://{BASE_DIR / "cache"}'),
+}
+if CACHES['default']['BACKEND'].endswith(('LocMemCache', 'FileBasedCache')):
+    # Room for sessions, cart state and rendered catalog cards (default is 300)
+    CACHES['default'].setdefault('OPTIONS', {}).setdefault('MAX_ENTRIES', 5000)
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    # A logout or flush in one process would leave the cached session alive
+    # in the others, so read sessions from the database instead
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Request metrics (core.metrics): Server-Timing headers, /metrics/ for
+# Prometheus (staff or "Authorization: Bearer <METRICS_TOKEN>") and, when
+# METRICS_LOG is set, one JSON line per request for `manage.py metrics_report`.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_SERVER_TIMING = env.bool('METRICS_SERVER_TIMING', default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_LOG = env('METRICS_LOG', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'raw': {'format': '%(message)s'}},
+    'handlers': {},
+    'loggers': {},
+}
+if METRICS_LOG:
+    LOGGING['handlers']['metrics_file'] = {
+        'class': 'logging.handlers.WatchedFileHandler',
+        'filename': METRICS_LOG,
+        'formatter': 'raw',
+    }
+    LOGGING['loggers']['core.metrics'] = {'handlers': ['metrics_file'], 'level': 'INFO', 'propagate': False}
+
+# Order numbers reserved per database round trip (see core.order_numbers)
+ORDER_NUMBER_BLOCK_SIZE = 20
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -158,17 +229,44 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]  # Ensure correct structur
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+# collectstatic writes hashed names plus .gz/.br copies; WhiteNoise serves
+# them with far-future immutable headers. Run collectstatic on every deploy.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+# Media is served by core.media.serve_media (Range + cache headers); turn
+# this off when a web server or CDN serves MEDIA_ROOT instead.
+SERVE_MEDIA = env.bool('SERVE_MEDIA', default=True)
+MEDIA_MAX_AGE = 60 * 60  # non-hashed media, e.g. uploads from before content hashing
+
+# Resized copies made for every uploaded menu image (see core/images.py)
+IMAGE_RENDITION_WIDTHS = (320, 640, 960)
+IMAGE_RENDITION_QUALITY = 80
+
+# JSON API (core/api.py): session auth only, no browsable renderer
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
+}
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'  # or your desired post-login page
 LOGOUT_REDIRECT_URL = 'login'
 
 # Email Backend
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Mail is queued as a job and delivered by `manage.py run_jobs` through
+# QUEUED_EMAIL_BACKEND, so requests never wait on SMTP.
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_USE_TLS = True
 EMAIL_HOST = env('EMAIL_HOST')
 EMAIL_PORT = env('EMAIL_PORT')
 EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 # JET_THEME = 'dark'
 JET_CSS = 'css/admin_custom.css'
+JET_INDEX_DASHBOARD = 'core.dashboard.IndexDashboard'
@@ -0,0 +1,132 @@
+from decimal import Decimal
+
+from django.db.models import Prefetch
+from django.http import Http404
+from django.views.decorators.http import condition
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .cart_batch import InvalidOperations, apply_cart_deltas, parse_operations
+from .cart_state import get_cart_quantities
+from .menu_cache import get_catalog_version, get_category, get_category_items, get_menu_snapshot
+from .models import Order, OrderItem
+from .pagination import keyset_page
+from .serializers import OrderSerializer
+
+# JSON API. Catalog and cart reads are served from the menu snapshot and
+# the cached cart state, so warm requests don't hit the database; catalog
+# responses carry the catalog version as a strong ETag for cheap revalidation.
+
+
+def catalog_etag(request, *args, **kwargs):
+    return f"catalog-{get_catalog_version()}"
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return get_menu_snapshot()['last_modified']
+
+
+def serialize_category(category):
+    return {
+        'id': category['id'],
+        'name': category['name'],
+        'description': category['description'],
+        'image_url': category['image_url'],
+    }
+
+
+def serialize_item(item):
+    return {
+        'id': item['id'],
+        'name': item['name'],
+        'description': item['description'],
+        'price': str(item['price']),
+        'image_url': item['image_url'],
+        'image_srcset': item['image_srcset'],
+        'image_webp_srcset': item['image_webp_srcset'],
+        'category_id': item['category_id'],
+    }
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+@api_view(['GET'])
+def catalog(request):
+    menu = get_menu_snapshot()
+    return Response({
+        'version': menu['version'],
+        'categories': [serialize_category(c) for c in menu['categories']],
+        'items': [serialize_item(i) for i in menu['items']],
+    })
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+@api_view(['GET'])
+def catalog_category(request, category_id):
+    menu = get_menu_snapshot()
+    category = get_category(menu, category_id)
+    if category is None:
+        raise Http404("No Category matches the given query.")
+    return Response(dict(
+        serialize_category(category),
+        version=menu['version'],
+        items=[serialize_item(i) for i in get_category_items(menu, category_id)],
+    ))
+
+
+def cart_payload(user):
+    # Priced from the snapshot, same as Cart.totals() which uses current prices
+    menu = get_menu_snapshot()
+    items_by_id = {item['id']: item for item in menu['items']}
+    lines = []
+    total_price = Decimal('0.00')
+    total_quantity = 0
+    for item_id, quantity in sorted(get_cart_quantities(user).items()):
+        item = items_by_id.get(item_id)
+        if item is None or quantity <= 0:
+            continue
+        line_total = item['price'] * quantity
+        lines.append({
+            'item_id': item_id,
+            'name': item['name'],
+            'price': str(item['price']),
+            'quantity': quantity,
+            'line_total': str(line_total),
+        })
+        total_price += line_total
+        total_quantity += quantity
+    return {
+        'items': lines,
+        'total_price': str(total_price.quantize(Decimal('0.01'))),
+        'total_quantity': total_quantity,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cart(request):
+    return Response(cart_payload(request.user))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cart_batch(request):
+    operations = request.data.get('operations') if isinstance(request.data, dict) else None
+    try:
+        apply_cart_deltas(request.user, parse_operations(operations))
+    except InvalidOperations as exc:
+        return Response({'error': str(exc)}, status=400)
+    return Response(cart_payload(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def orders(request):
+    queryset = Order.objects.filter(user=request.user).prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+    )
+    page = keyset_page(queryset, request.GET.get('cursor'))
+    return Response({
+        'results': OrderSerializer(page.object_list, many=True).data,
+        'next_cursor': page.next_cursor,
+    })
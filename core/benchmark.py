@@ -0,0 +1,154 @@
+import itertools
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.models import CustomUser
+
+from .metrics import percentile
+from .models import Category, Items, Order, OrderItem
+
+# Synthetic data and a scripted walk through the ordering funnel, used by
+# `manage.py benchmark`. Everything here runs against the test database.
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+STATUSES = ['in_process', 'on_way', 'delivered', 'done', 'cancelled']
+
+
+def batched(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def seed(categories, items, users, orders, lines_per_order=2, rng=None):
+    rng = rng or random.Random(0)
+
+    Category.objects.bulk_create(
+        Category(name=f'Category {n}', description=f'Synthetic category {n}') for n in range(categories)
+    )
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    for batch in batched(
+        Items(name=f'Item {n}', description=f'Synthetic menu item number {n}, grilled and spiced',
+              price=Decimal(rng.randint(50, 500)), category_id=category_ids[n % len(category_ids)])
+        for n in range(items)
+    ):
+        Items.objects.bulk_create(batch)
+    item_ids = list(Items.objects.values_list('id', flat=True))
+    prices = dict(Items.objects.values_list('id', 'price'))
+
+    password = make_password(PASSWORD)
+    for batch in batched(
+        CustomUser(username=f'bench{n}', email=f'bench{n}@example.com', password=password, is_staff=(n == 0))
+        for n in range(users)
+    ):
+        CustomUser.objects.bulk_create(batch)
+    user_ids = list(CustomUser.objects.filter(username__startswith='bench').values_list('id', flat=True))
+
+    # Order history; numbers are set here since bulk_create skips Order.save()
+    for batch in batched(range(orders)):
+        plans = []
+        for n in batch:
+            lines = []
+            for product_id in rng.sample(item_ids, min(lines_per_order, len(item_ids))):
+                quantity = rng.randint(1, 3)
+                lines.append((product_id, quantity, prices[product_id] * quantity))
+            plans.append(lines)
+        created = Order.objects.bulk_create(
+            Order(order_number=f'B{n:012d}', user_id=user_ids[n % len(user_ids)], status=rng.choice(STATUSES),
+                  total_amount=sum(line[2] for line in lines), status_pay='PAID', razorpay_payment_id=f'pay_seed{n}')
+            for n, lines in zip(batch, plans)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order_id=order.pk, product_id=product_id, quantity=quantity, price=price)
+            for order, lines in zip(created, plans)
+            for product_id, quantity, price in lines
+        )
+
+
+def timed(step, results, request):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = request()
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise RuntimeError(f"{step} returned {response.status_code}")
+    results.setdefault(step, {'ms': [], 'queries': []})
+    results[step]['ms'].append(elapsed)
+    results[step]['queries'].append(len(queries))
+    return response
+
+
+def run_funnel(iterations, warmup=5, rng=None):
+    """Walk home -> category -> cart -> pay -> history for a rotating set of
+    users. Returns {step: {'ms': [...], 'queries': [...]}} for the timed runs."""
+    rng = rng or random.Random(1)
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    items_by_category = {}
+    for item_id, category_id in Items.objects.values_list('id', 'category_id'):
+        items_by_category.setdefault(category_id, []).append(item_id)
+    users = list(CustomUser.objects.filter(username__startswith='bench').order_by('id')[:max(iterations, 1)])
+
+    # One client per user: a second login for the same user would end the first session
+    clients = {}
+    results = {}
+    payments = itertools.count(1)
+    for n in range(warmup + iterations):
+        user = users[n % len(users)]
+        client = clients.get(user.pk)
+        if client is None:
+            client = clients[user.pk] = Client()
+            client.force_login(user)
+
+        run = results if n >= warmup else {}
+        category_id = rng.choice(category_ids)
+        item_id = rng.choice(items_by_category[category_id])
+
+        timed('home', run, lambda: client.get(reverse('home')))
+        timed('category', run, lambda: client.get(reverse('category_items', args=[category_id])))
+        timed('toggle_cart', run, lambda: client.post(reverse('toggle_cart_item'), {'item_id': item_id, 'action': 'add'}))
+        timed('view_cart', run, lambda: client.get(reverse('view_cart')))
+        response = timed('payment_success', run, lambda: client.post(
+            reverse('payment_success'), {'razorpay_payment_id': f'pay_bench{next(payments)}'}
+        ))
+        timed('order_receipt', run, lambda: client.get(response.json()['redirect_url']))
+        timed('my_orders', run, lambda: client.get(reverse('my_orders')))
+        timed('order_list', run, lambda: client.get(reverse('order_list')))
+    return results
+
+
+def summarize(results):
+    return {
+        step: {
+            'p50_ms': round(statistics.median(data['ms']), 2),
+            'p99_ms': round(percentile(data['ms'], 99), 2),
+            'queries': max(data['queries']),
+        }
+        for step, data in results.items()
+    }
+
+
+def compare(summary, baseline, tolerance, noise_ms):
+    """Regressions against a stored summary: more queries than before, or a
+    p50 more than `tolerance` (and `noise_ms`) slower."""
+    regressions = []
+    for step, current in summary.items():
+        before = baseline.get(step)
+        if before is None:
+            continue
+        if current['queries'] > before['queries']:
+            regressions.append(f"{step}: {current['queries']} queries (was {before['queries']})")
+        limit = max(before['p50_ms'] * (1 + tolerance), before['p50_ms'] + noise_ms)
+        if current['p50_ms'] > limit:
+            regressions.append(f"{step}: p50 {current['p50_ms']} ms (was {before['p50_ms']} ms)")
+    return regressions
@@ -0,0 +1,80 @@
+from django.db import transaction
+
+from .cart_state import invalidate_cart_state
+from .models import Cart, CartItem, Items
+
+# Batched cart updates: the client collects +/- taps and sends them as one
+# list of {item_id, delta} operations, applied here in a single transaction.
+MAX_OPERATIONS = 100
+
+
+class InvalidOperations(ValueError):
+    pass
+
+
+def parse_operations(operations):
+    """Merge [{'item_id': .., 'delta': ..}, ...] into {item_id: net delta}."""
+    if not isinstance(operations, list) or not operations:
+        raise InvalidOperations("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise InvalidOperations(f"At most {MAX_OPERATIONS} operations per batch")
+
+    deltas = {}
+    for operation in operations:
+        try:
+            item_id = int(operation['item_id'])
+            delta = int(operation['delta'])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidOperations("Each operation needs an integer item_id and delta")
+        deltas[item_id] = deltas.get(item_id, 0) + delta
+    return {item_id: delta for item_id, delta in deltas.items() if delta}
+
+
+def apply_cart_deltas(user, deltas):
+    """Apply net quantity changes to the user's active cart.
+
+    Quantities are clamped at zero and rows that reach zero are removed.
+    Returns {item_id: new quantity} for the touched items.
+    """
+    if not deltas:
+        return {}
+
+    known = set(Items.objects.filter(id__in=deltas).values_list('id', flat=True))
+    missing = sorted(set(deltas) - known)
+    if missing:
+        raise InvalidOperations(f"Unknown items: {', '.join(map(str, missing))}")
+
+    quantities = {}
+    with transaction.atomic():
+        # Lock the cart so concurrent batches for the same user apply in turn
+        cart = Cart.objects.select_for_update().filter(user=user, order__isnull=True).first()
+        if cart is None:
+            cart = Cart.objects.create(user=user)
+        existing = {
+            cart_item.menu_item_id: cart_item
+            for cart_item in CartItem.objects.filter(cart=cart, menu_item_id__in=deltas)
+        }
+
+        to_create, to_update, to_delete = [], [], []
+        for item_id, delta in deltas.items():
+            cart_item = existing.get(item_id)
+            quantity = max((cart_item.quantity if cart_item else 0) + delta, 0)
+            quantities[item_id] = quantity
+            if cart_item is None:
+                if quantity:
+                    to_create.append(CartItem(cart=cart, menu_item_id=item_id, quantity=quantity))
+            elif quantity:
+                cart_item.quantity = quantity
+                to_update.append(cart_item)
+            else:
+                to_delete.append(cart_item.pk)
+
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['quantity'])
+        if to_delete:
+            CartItem.objects.filter(pk__in=to_delete).delete()
+
+    invalidate_cart_state(user)
+    return quantities
@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CartItem
+
+# Per-user {item_id: quantity} map for the active cart (order=None). Views read
+# it for quantity badges; every cart mutation invalidates it. A read racing a
+# write can still cache the old rows, so entries are kept only briefly.
+CART_STATE_KEY = 'cart:state:{}'
+CART_STATE_TIMEOUT = 60 * 5
+
+
+def _key(user):
+    return CART_STATE_KEY.format(user.pk)
+
+
+def load_cart_quantities(user):
+    rows = CartItem.objects.filter(
+        cart__user=user, cart__order__isnull=True
+    ).values_list('menu_item_id', 'quantity')
+    return dict(rows)
+
+
+def get_cart_quantities(user):
+    if not user.is_authenticated:
+        return {}
+    quantities = cache.get(_key(user))
+    if quantities is None:
+        quantities = load_cart_quantities(user)
+        cache.set(_key(user), quantities, CART_STATE_TIMEOUT)
+    return quantities
+
+
+def invalidate_cart_state(user):
+    # Dropped rather than edited in place: two requests editing the cached
+    # map at once would overwrite each other's items. Deleted again after
+    # commit in case another request cached the old rows in between.
+    key = _key(user)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from jet.dashboard import modules
+from jet.dashboard.dashboard import DefaultIndexDashboard
+
+from .models import ProductSalesRollup, SalesRollup
+from .rollups import buckets
+
+# Admin index (JET_INDEX_DASHBOARD): jet's default layout plus today's
+# sales. Everything is read from the rollup tables, never from Order.
+
+
+class SalesSummary(modules.DashboardModule):
+    title = 'Sales'
+    template = 'dashboard/sales_module.html'
+    hours = 12
+    top = 5
+
+    def init_with_context(self, context):
+        (_, hour), (_, today) = buckets(timezone.now())
+        _, yesterday = buckets(today - timedelta(hours=1))[1]
+        days = {row.bucket: row for row in SalesRollup.objects.filter(period='day', bucket__in=[today, yesterday])}
+        self.today = days.get(today)
+        self.days = [('Today', self.today), ('Yesterday', days.get(yesterday))]
+        self.children = list(SalesRollup.objects.filter(
+            period='hour', bucket__gt=hour - timedelta(hours=self.hours),
+        ).order_by('-bucket'))
+
+        products = ProductSalesRollup.objects.filter(period='day', bucket=today)
+        self.products = list(products.select_related('product').order_by('-quantity')[:self.top])
+        self.categories = list(products.values('category__name').annotate(
+            quantity=Sum('quantity'), revenue=Sum('revenue'),
+        ).order_by('-revenue')[:self.top])
+
+
+class IndexDashboard(DefaultIndexDashboard):
+    def init_with_context(self, context):
+        super().init_with_context(context)
+        self.available_children.append(SalesSummary)
+        self.children.append(SalesSummary(column=2, order=1))
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import json
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from PIL import Image, ImageOps
+
+# Uploaded menu images are stored under the hash of their content, and each
+# one gets resized WebP/JPEG renditions plus a small JSON manifest under
+# renditions/<stem>/. The menu snapshot reads the manifest to build srcsets.
+RENDITIONS_DIR = 'renditions'
+FORMATS = (('webp', 'WEBP'), ('jpeg', 'JPEG'))
+
+
+class ContentHashStorage(FileSystemStorage):
+    """Names files by the SHA-256 of their content, so re-uploading the same
+    image reuses the stored copy instead of adding a suffixed duplicate."""
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest.hexdigest()[:32] + extension).replace('\\', '/')
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+image_storage = ContentHashStorage()
+
+
+def get_image_storage():
+    return image_storage
+
+
+def rendition_dir(name):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f"{RENDITIONS_DIR}/{stem}"
+
+
+def manifest_name(name):
+    return f"{rendition_dir(name)}/manifest.json"
+
+
+def has_renditions(name):
+    return default_storage.exists(manifest_name(name))
+
+
+def generate_renditions(name):
+    """Write the renditions and manifest for a stored image. Idempotent."""
+    with image_storage.open(name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    manifest = {'width': image.width, 'height': image.height, 'renditions': {}}
+    for extension, pil_format in FORMATS:
+        entries = []
+        for width in settings.IMAGE_RENDITION_WIDTHS:
+            if width >= image.width:
+                break  # never upscale; the original covers the top end
+            path = f"{rendition_dir(name)}/{width}.{extension}"
+            if not default_storage.exists(path):
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.LANCZOS)
+                if pil_format == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                buffer = io.BytesIO()
+                resized.save(buffer, pil_format, quality=settings.IMAGE_RENDITION_QUALITY)
+                default_storage.save(path, ContentFile(buffer.getvalue()))
+            entries.append([width, path])
+        manifest['renditions'][extension] = entries
+
+    path = manifest_name(name)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(json.dumps(manifest).encode()))
+    return manifest
+
+
+def read_manifest(name):
+    try:
+        with default_storage.open(manifest_name(name)) as manifest:
+            return json.load(manifest)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def image_info(image):
+    """URL, srcsets and size of an image field for the menu snapshot."""
+    info = {'url': '', 'srcset': '', 'webp_srcset': '', 'width': None, 'height': None}
+    if not image:
+        return info
+
+    info['url'] = image.url
+    manifest = read_manifest(image.name)
+    if manifest is None:
+        return info  # renditions not generated yet; the original still works
+
+    original = f"{image.url} {manifest['width']}w"
+    for extension, key in (('jpeg', 'srcset'), ('webp', 'webp_srcset')):
+        entries = [f"{default_storage.url(path)} {width}w" for width, path in manifest['renditions'].get(extension, [])]
+        if extension == 'jpeg':
+            entries.append(original)
+        info[key] = ', '.join(entries)
+    info['width'] = manifest['width']
+    info['height'] = manifest['height']
+    return info
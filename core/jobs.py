@@ -0,0 +1,94 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# name -> callable(**payload), filled by the @job decorator (see core.tasks)
+HANDLERS = {}
+
+BACKOFF_BASE = 10  # seconds
+BACKOFF_MAX = 60 * 60
+STALE_AFTER = timedelta(minutes=15)
+
+
+def job(name):
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, max_attempts=5, delay=0, **payload):
+    # Created in the caller's transaction, so the job only exists if that commits
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(limit=10):
+    now = timezone.now()
+    candidates = Job.objects.filter(status='pending', run_after__lte=now) \
+        .order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+
+    claimed = []
+    for job_id in candidates:
+        # Conditional update: only one worker can move a job out of pending
+        if Job.objects.filter(pk=job_id, status='pending').update(
+            status='running', attempts=F('attempts') + 1, updated_at=now
+        ):
+            claimed.append(job_id)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_after', 'id'))
+
+
+def run(job_obj):
+    handler = HANDLERS.get(job_obj.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job {job_obj.name!r}")
+        handler(**job_obj.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s failed (attempt %s/%s)", job_obj, job_obj.attempts, job_obj.max_attempts)
+        if job_obj.attempts >= job_obj.max_attempts:
+            Job.objects.filter(pk=job_obj.pk).update(
+                status='failed', last_error=error, updated_at=timezone.now()
+            )
+        else:
+            Job.objects.filter(pk=job_obj.pk).update(
+                status='pending', last_error=error,
+                run_after=timezone.now() + backoff(job_obj.attempts), updated_at=timezone.now()
+            )
+        return False
+
+    Job.objects.filter(pk=job_obj.pk).update(status='done', last_error='', updated_at=timezone.now())
+    return True
+
+
+def run_pending(limit=10):
+    jobs = claim(limit)
+    for job_obj in jobs:
+        run(job_obj)
+    return len(jobs)
+
+
+def requeue_stale():
+    # Jobs left running by a worker that died go back to the queue
+    cutoff = timezone.now() - STALE_AFTER
+    return Job.objects.filter(status='running', updated_at__lt=cutoff).update(
+        status='pending', run_after=timezone.now(), updated_at=timezone.now()
+    )
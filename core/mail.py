@@ -0,0 +1,73 @@
+import base64
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .jobs import enqueue
+from .metrics import external_call
+
+
+def serialize_message(message):
+    attachments = []
+    for attachment in message.attachments:
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'content_subtype': message.content_subtype,
+        'alternatives': [list(alt) for alt in getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+    }
+
+
+def deserialize_message(data):
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(alt) for alt in data['alternatives']],
+    )
+    message.content_subtype = data['content_subtype']
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def deliver(*messages):
+    # Sends right away through the real backend; only the job worker calls this
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    with external_call('smtp'):
+        return connection.send_messages(list(messages))
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Email backend that queues every message as a ``send_email`` job.
+
+    send_mail(), password reset emails, OTPs etc. return immediately and the
+    `run_jobs` worker delivers them through QUEUED_EMAIL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            enqueue('send_email', message=serialize_message(message))
+            count += 1
+        return count
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly/daily sales rollups from the order history, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Orders per transaction.")
+
+    def handle(self, *args, **options):
+        done = 0
+        for done in backfill(options['chunk_size']):
+            self.stdout.write(f"{done} order(s) processed")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups from {done} order(s)"))
@@ -0,0 +1,80 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.benchmark import compare, run_funnel, seed, summarize
+from core.models import Items
+from core.payments import reset_client
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = ("Seed a test database at the given scale, drive the ordering funnel "
+            "through the test client and report p50/p99 latency and query counts "
+            "per step. Fails when a step regresses against the stored baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--items', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--orders', type=int, default=10000, help="Seeded order history (e.g. 1000000).")
+        parser.add_argument('--iterations', type=int, default=50, help="Timed walks through the funnel.")
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Summary to compare against.")
+        parser.add_argument('--save-baseline', action='store_true', help="Write this run as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed p50 slowdown (0.25 = 25%%).")
+        parser.add_argument('--noise-ms', type=float, default=2.0, help="Ignore p50 changes smaller than this.")
+        parser.add_argument('--keepdb', action='store_true', help="Reuse the seeded test database between runs.")
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, keepdb=options['keepdb'])
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            # Private cache and the in-process gateway: never touch real Razorpay
+            # or a shared cache. Plain static storage so no collectstatic manifest is needed.
+            with override_settings(
+                PAYMENT_GATEWAY='fake',
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                    'LOCATION': 'benchmark', 'OPTIONS': {'MAX_ENTRIES': 100000}}},
+                STORAGES=dict(settings.STORAGES, staticfiles={
+                    'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+                }),
+            ):
+                reset_client()
+                if not Items.objects.exists():
+                    self.stdout.write("Seeding...")
+                    seed(options['categories'], options['items'], options['users'], options['orders'])
+                results = run_funnel(options['iterations'], options['warmup'])
+            reset_client()
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        summary = summarize(results)
+        baseline = None
+        if os.path.exists(options['baseline']):
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        self.stdout.write(f"{'step':<18} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}   baseline p50 / queries")
+        for step, row in summary.items():
+            before = baseline.get(step) if baseline else None
+            reference = f"{before['p50_ms']:>8} / {before['queries']}" if before else '-'
+            self.stdout.write(f"{step:<18} {row['p50_ms']:>8} {row['p99_ms']:>8} {row['queries']:>8}   {reference}")
+
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            with open(options['baseline'], 'w') as f:
+                json.dump(summary, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+        elif baseline:
+            regressions = compare(summary, baseline, options['tolerance'], options['noise_ms'])
+            if regressions:
+                raise CommandError("Regressions:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
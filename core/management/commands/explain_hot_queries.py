@@ -0,0 +1,54 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from core.models import Cart, CartItem, Items, Job, Order, OrderEvent
+
+# SQLite: "SCAN core_order" (no index at all); PostgreSQL: "Seq Scan on core_order"
+FULL_SCAN = re.compile(r'(\bSCAN (?!.*\bUSING\b)\S+|Seq Scan on \S+)')
+
+
+def hot_queries():
+    User = get_user_model()
+    now = timezone.now()
+    return [
+        ('active cart', Cart.objects.filter(user_id=1, order__isnull=True)),
+        ('cart quantities', CartItem.objects.filter(cart__user_id=1, cart__order__isnull=True)
+            .values_list('menu_item_id', 'quantity')),
+        ('order history', Order.objects.filter(user_id=1).order_by('-created_at', '-id')[:21]),
+        ('kitchen board', Order.objects.filter(status='in_process').order_by('-created_at', '-id')[:51]),
+        ('payment idempotency', Order.objects.filter(user_id=1, razorpay_payment_id='pay_x')),
+        ('category items', Items.objects.filter(category_id=1).order_by('id')),
+        ('login by email', User.objects.alias(email_lower=Lower('email')).filter(email_lower='a@b.c')),
+        ('login by username', User.objects.alias(username_lower=Lower('username')).filter(username_lower='a')),
+        ('due jobs', Job.objects.filter(status='pending', run_after__lte=now).order_by('run_after', 'id')[:10]),
+        ('order events', OrderEvent.objects.filter(id__gt=1).order_by('id')[:100]),
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Run EXPLAIN for the hot queries and flag full table scans. "
+            "On PostgreSQL run it against realistic data: the planner prefers "
+            "sequential scans on tiny tables.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail', action='store_true', help="Exit with an error if any query scans a table.")
+
+    def handle(self, *args, **options):
+        flagged = []
+        for name, queryset in hot_queries():
+            plan = queryset.explain()
+            scans = FULL_SCAN.findall(plan)
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f"[SCAN] {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[ok]   {name}"))
+            if options['verbosity'] > 1:
+                self.stdout.write(f"       {plan}".replace("\n", "\n       "))
+
+        if flagged and options['fail']:
+            raise CommandError(f"Full scans in: {', '.join(flagged)}")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.menu_io import detect_format, export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = "Export menu items as CSV or JSON Lines, in the format import_menu reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="File to write (default: stdout).")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        if path == '-':
+            write_rows(self.stdout, fmt, export_rows())
+            return
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            write_rows(stream, fmt, export_rows())
+        self.stderr.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.menu_io import MenuImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Import menu items from CSV or JSON Lines (columns: id, sku, name, "
+            "description, price, category, image). Rows with a sku update the "
+            "item with that sku, rows with only an id update that item; "
+            "categories are created by name when missing.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or - for stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None)
+        parser.add_argument('--images-dir', default=None,
+                            help="Directory the image column is relative to; files are stored by content hash.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        importer = MenuImporter(images_dir=options['images_dir'], batch_size=options['batch_size'])
+        try:
+            if path == '-':
+                stats = importer.run(read_rows(sys.stdin, fmt))
+            else:
+                with open(path, newline='', encoding='utf-8') as stream:
+                    stats = importer.run(read_rows(stream, fmt))
+        except FileNotFoundError:
+            raise CommandError(f"No such file: {path}")
+        except ValueError as exc:
+            # Malformed JSON line; nothing was written
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        for error in importer.errors:
+            self.stderr.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['created_or_updated']} upserted by sku, {stats['updated']} updated by id, "
+            f"{stats['inserted']} inserted, "
+            f"{stats['categories']} categories created, {stats['images']} images stored, "
+            f"{stats['skipped']} rows skipped"
+        ))
@@ -0,0 +1,67 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.metrics import percentile
+
+
+class Command(BaseCommand):
+    help = ("Summarise the per-request metrics log (METRICS_LOG): latency "
+            "percentiles, query counts and repeated queries per view.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help="Log to read (default: METRICS_LOG).")
+        parser.add_argument('--since', type=int, default=None, help="Only the last N minutes.")
+        parser.add_argument('--view', default=None, help="Only this view name.")
+        parser.add_argument('--top', type=int, default=10, help="Repeated queries to list.")
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.METRICS_LOG
+        if not path:
+            raise CommandError("Set METRICS_LOG or pass --file.")
+        since = timezone.now() - timezone.timedelta(minutes=options['since']) if options['since'] else None
+
+        views = defaultdict(list)
+        duplicates = Counter()
+        try:
+            with open(path) as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if options['view'] and record['view'] != options['view']:
+                        continue
+                    if since and parse_datetime(record['ts']) < since:
+                        continue
+                    views[record['view']].append(record)
+                    for sql, count in record['duplicates']:
+                        duplicates[(record['view'], sql)] += count - 1
+        except FileNotFoundError:
+            raise CommandError(f"No metrics log at {path}")
+
+        if not views:
+            self.stdout.write("No requests recorded.")
+            return
+
+        self.stdout.write(f"{'view':<32} {'reqs':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                          f"{'queries':>8} {'max q':>6} {'db ms':>7} {'ext ms':>7}")
+        for view, records in sorted(views.items(), key=lambda pair: -len(pair[1])):
+            latencies = [r['ms'] for r in records]
+            queries = [r['queries'] for r in records]
+            db_ms = sum(r['db_ms'] for r in records) / len(records)
+            ext_ms = sum(sum(r['external_ms'].values()) for r in records) / len(records)
+            self.stdout.write(
+                f"{view[:32]:<32} {len(records):>6} {percentile(latencies, 50):>8.1f} "
+                f"{percentile(latencies, 95):>8.1f} {percentile(latencies, 99):>8.1f} "
+                f"{sum(queries) / len(queries):>8.1f} {max(queries):>6} {db_ms:>7.1f} {ext_ms:>7.1f}"
+            )
+
+        if duplicates:
+            self.stdout.write("\nRepeated queries (extra executions):")
+            for (view, sql), extra in duplicates.most_common(options['top']):
+                self.stdout.write(f"{extra:>6}  {view}: {sql[:160]}")
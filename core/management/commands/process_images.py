@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.images import generate_renditions, has_renditions, image_storage
+from core.menu_cache import bump_catalog_version
+from core.models import Category, Items
+
+
+class Command(BaseCommand):
+    help = ("Move existing menu images to content-hash names (merging duplicate "
+            "uploads) and generate their WebP/JPEG renditions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate renditions that already exist.")
+        parser.add_argument('--prune', action='store_true',
+                            help="Delete the old files once no row points at them.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        replaced = set()
+        processed = 0
+        for model in (Category, Items):
+            for obj in model.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image'):
+                name = obj.image.name
+                if not image_storage.exists(name):
+                    self.stdout.write(self.style.WARNING(f"Missing file for {model.__name__} {obj.pk}: {name}"))
+                    continue
+
+                with image_storage.open(name) as original:
+                    hashed = image_storage.save(os.path.join(os.path.dirname(name), os.path.basename(name)), original)
+                renamed = hashed != name
+                rendered = options['force'] or not has_renditions(hashed)
+                if rendered:
+                    generate_renditions(hashed)
+                if renamed or rendered:
+                    # update() so this doesn't bump the catalog once per row;
+                    # a new updated_at re-renders the row's cached card
+                    model.objects.filter(pk=obj.pk).update(image=hashed, updated_at=now)
+                if renamed:
+                    replaced.add(name)
+                processed += 1
+
+        if options['prune']:
+            in_use = set(Items.objects.values_list('image', flat=True)) | set(Category.objects.values_list('image', flat=True))
+            for name in sorted(replaced - in_use):
+                image_storage.delete(name)
+                self.stdout.write(f"Deleted {name}")
+
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} image(s), renamed {len(replaced)}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Items
+from core.ratings import rebuild_rating_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute rating_sum, rating_count and rating for menu items from FooRating."
+
+    def add_arguments(self, parser):
+        parser.add_argument('item_ids', nargs='*', type=int, help="Only these items (default: all).")
+
+    def handle(self, *args, **options):
+        items = Items.objects.filter(pk__in=options['item_ids']) if options['item_ids'] else None
+        updated = rebuild_rating_totals(items)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {updated} item(s)"))
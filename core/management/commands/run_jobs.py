@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (refunds, emails), retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process what is due now and exit.")
+        parser.add_argument('--batch', type=int, default=10, help="Jobs claimed per round.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            requeue_stale()
+            processed = run_pending(options['batch'])
+            if processed:
+                self.stdout.write(f"Processed {processed} job(s)")
+            if options['once']:
+                if not processed:
+                    break
+                continue
+            if not processed:
+                time.sleep(options['sleep'])
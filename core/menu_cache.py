@@ -0,0 +1,118 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .images import image_info
+from .models import Category, Items
+
+# The catalog version goes up on every Items/Category change (see core.signals).
+# Snapshots are stored under their version, so a bump makes every worker
+# rebuild on its next request and the old snapshot simply expires.
+VERSION_KEY = 'menu:version'
+SNAPSHOT_KEY = 'menu:snapshot:{}'
+# When the catalog last changed; deletes leave no updated_at behind
+CHANGED_AT_KEY = 'menu:changed_at'
+
+# Last snapshot this process unpickled, reused while the version is unchanged
+_local_snapshot = None
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a flushed cache never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    # Record the time first so whoever builds the new version sees it
+    cache.set(CHANGED_AT_KEY, timezone.now(), None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(VERSION_KEY, version, None)
+        return version
+
+
+def _image_fields(image):
+    info = image_info(image)
+    return {
+        'image_url': info['url'],
+        'image_srcset': info['srcset'],
+        'image_webp_srcset': info['webp_srcset'],
+        'image_width': info['width'],
+        'image_height': info['height'],
+    }
+
+
+def build_snapshot(version):
+    categories = []
+    for category in Category.objects.order_by('id'):
+        categories.append({
+            'id': category.id,
+            'name': category.name,
+            'description': category.description or '',
+            'short_description': Truncator(category.description or '').chars(100),
+            'updated_at': category.updated_at,
+            **_image_fields(category.image),
+        })
+
+    items = []
+    items_by_category = {}
+    for item in Items.objects.order_by('id'):
+        data = {
+            'id': item.id,
+            'name': item.name,
+            'description': item.description,
+            'short_description': Truncator(item.description).chars(100),
+            'price': item.price,
+            'category_id': item.category_id,
+            'updated_at': item.updated_at,
+            **_image_fields(item.image),
+        }
+        items.append(data)
+        items_by_category.setdefault(item.category_id, []).append(data)
+
+    timestamps = [c['updated_at'] for c in categories] + [i['updated_at'] for i in items]
+    changed_at = cache.get(CHANGED_AT_KEY)
+    if changed_at is not None:
+        timestamps.append(changed_at)
+    return {
+        'version': version,
+        'last_modified': max(timestamps) if timestamps else None,
+        'categories': categories,
+        'categories_by_id': {c['id']: c for c in categories},
+        'items': items,
+        'items_by_category': items_by_category,
+    }
+
+
+def get_menu_snapshot():
+    global _local_snapshot
+
+    version = get_catalog_version()
+    if _local_snapshot is not None and _local_snapshot['version'] == version:
+        return _local_snapshot
+
+    key = SNAPSHOT_KEY.format(version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(version)
+        cache.set(key, snapshot, settings.MENU_CACHE_TIMEOUT)
+
+    _local_snapshot = snapshot
+    return snapshot
+
+
+def get_category(snapshot, category_id):
+    return snapshot['categories_by_id'].get(category_id)
+
+
+def get_category_items(snapshot, category_id):
+    return snapshot['items_by_category'].get(category_id, [])
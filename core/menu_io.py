@@ -0,0 +1,227 @@
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .images import has_renditions, image_storage
+from .jobs import enqueue
+from .menu_cache import bump_catalog_version
+from .models import Category, Items
+
+# Streaming catalog import/export (manage.py import_menu / export_menu).
+# Rows are read one at a time and written in batches with bulk_create, so
+# no per-row save() or signal runs; the catalog version is bumped once.
+# Existing items are matched on sku, or on id for items without one, so an
+# export imported back changes nothing.
+FIELDS = ['id', 'sku', 'name', 'description', 'price', 'category', 'image']
+IMAGE_UPLOAD_DIR = 'static/images/'
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) from a CSV or JSON Lines stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            yield number, json.loads(line)
+
+
+def write_rows(stream, fmt, rows):
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    for row in rows:
+        stream.write(json.dumps(row) + '\n')
+
+
+def export_rows():
+    items = Items.objects.select_related('category').order_by('id')
+    for item in items.iterator(chunk_size=2000):
+        yield {
+            'id': item.pk,
+            'sku': item.sku or '',
+            'name': item.name,
+            'description': item.description,
+            'price': str(item.price),
+            'category': item.category.name if item.category else '',
+            'image': item.image.name if item.image else '',
+        }
+
+
+class MenuImporter:
+    def __init__(self, images_dir=None, batch_size=1000):
+        self.images_dir = images_dir
+        self.batch_size = batch_size
+        # First category with a given name wins, as in the admin's dropdown order
+        self.categories = {}
+        for category_id, name in Category.objects.order_by('-id').values_list('id', 'name'):
+            self.categories[name] = category_id
+        self.images = {}
+        self.new_images = set()
+        self.stats = {'created_or_updated': 0, 'updated': 0, 'inserted': 0, 'categories': 0, 'images': 0, 'skipped': 0}
+        self.errors = []
+
+    def run(self, rows):
+        with transaction.atomic():
+            batch = []
+            for number, row in rows:
+                try:
+                    item = self.build_item(row)
+                except RowError as exc:
+                    self.stats['skipped'] += 1
+                    self.errors.append(f"row {number}: {exc}")
+                    continue
+                item._row_number = number
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = []
+            if batch:
+                self.flush(batch)
+
+            for name in self.new_images:
+                if not has_renditions(name):
+                    enqueue('generate_renditions', image=name)
+            transaction.on_commit(bump_catalog_version)
+        self.stats['images'] = len(self.new_images)
+        return self.stats
+
+    def build_item(self, row):
+        if not isinstance(row, dict):
+            raise RowError(f"expected an object, got {type(row).__name__}")
+        # JSON Lines may carry numbers where CSV has text
+        row = {key: value if value is None or isinstance(value, str) else str(value)
+               for key, value in row.items()}
+        name = (row.get('name') or '').strip()
+        if not name:
+            raise RowError("name is required")
+        try:
+            price = Decimal(str(row.get('price', '')).strip())
+        except InvalidOperation:
+            price = None
+        if price is None or not price.is_finite() or price < 0:
+            raise RowError(f"invalid price {row.get('price')!r}")
+
+        item_id = str(row.get('id') or '').strip()
+        if item_id and not item_id.isdigit():
+            raise RowError(f"invalid id {row.get('id')!r}")
+
+        item = Items(
+            id=int(item_id) if item_id else None,
+            sku=(row.get('sku') or '').strip() or None,
+            name=name,
+            description=row.get('description') or '',
+            price=price,
+        )
+        # Blank optional columns leave the stored value alone on update
+        item._update_fields = ['name', 'price']
+        if item.description:
+            item._update_fields.append('description')
+        category = (row.get('category') or '').strip()
+        if category:
+            item.category_id = self.categories.get(category)
+            item._category_name = category
+            item._update_fields.append('category')
+        image = (row.get('image') or '').strip()
+        if image:
+            item.image = self.resolve_image(image)
+            item._update_fields.append('image')
+        return item
+
+    def resolve_image(self, image):
+        """Stored name for an image column: a file under images_dir is
+        uploaded (deduplicated by content hash), an existing stored name is
+        kept as is."""
+        if image in self.images:
+            return self.images[image]
+
+        path = os.path.join(self.images_dir, image) if self.images_dir else None
+        if path and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                name = image_storage.save(IMAGE_UPLOAD_DIR + os.path.basename(image), File(f))
+            self.new_images.add(name)
+        elif image_storage.exists(image):
+            name = image
+        else:
+            raise RowError(f"image {image!r} not found")
+        self.images[image] = name
+        return name
+
+    def flush(self, batch):
+        self.create_missing_categories(batch)
+
+        with_sku = [item for item in batch if item.sku]
+        with_id = [item for item in batch if not item.sku and item.pk]
+        new = [item for item in batch if not item.sku and not item.pk]
+        if with_sku:
+            for update_fields, items in self.by_update_fields(self.dedupe(with_sku)):
+                for item in items:
+                    item.pk = None  # the sku decides which row it is
+                Items.objects.bulk_create(
+                    items, update_conflicts=True,
+                    unique_fields=['sku'], update_fields=update_fields,
+                )
+                self.stats['created_or_updated'] += len(items)
+        if with_id:
+            self.update_by_id(with_id)
+        if new:
+            # Nothing to match on, so these are always new rows
+            Items.objects.bulk_create(new)
+            self.stats['inserted'] += len(new)
+
+    def update_by_id(self, items):
+        items = list({item.pk: item for item in items}.values())
+        known = set(Items.objects.filter(pk__in=[item.pk for item in items]).values_list('pk', flat=True))
+        now = timezone.now()
+        for item in items:
+            if item.pk not in known:
+                self.stats['skipped'] += 1
+                self.errors.append(f"row {item._row_number}: no item with id {item.pk}")
+        for update_fields, group in self.by_update_fields(item for item in items if item.pk in known):
+            for item in group:
+                item.updated_at = now
+            Items.objects.bulk_update(group, update_fields)
+            self.stats['updated'] += len(group)
+
+    def by_update_fields(self, items):
+        # One statement per set of supplied columns, usually just one
+        groups = {}
+        for item in items:
+            groups.setdefault(tuple(item._update_fields), []).append(item)
+        for fields, group in groups.items():
+            yield [*fields, 'updated_at'], group
+
+    def create_missing_categories(self, batch):
+        missing = {item._category_name for item in batch
+                   if getattr(item, '_category_name', None) and item.category_id is None}
+        if missing:
+            created = Category.objects.bulk_create(Category(name=name) for name in sorted(missing))
+            for category in created:
+                self.categories[category.name] = category.pk
+            self.stats['categories'] += len(created)
+        for item in batch:
+            if getattr(item, '_category_name', None):
+                item.category_id = self.categories[item._category_name]
+
+    def dedupe(self, items):
+        # ON CONFLICT can't touch the same row twice in one statement; last row wins
+        return list({item.sku: item for item in items}.values())
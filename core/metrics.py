@@ -0,0 +1,205 @@
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+# Per-request numbers (latency, DB queries, duplicate queries, time spent in
+# Razorpay/SMTP) collected by MetricsMiddleware. Each request is added to an
+# in-process registry served at /metrics/ in Prometheus text format, and
+# written as one JSON line to the 'core.metrics' logger for `metrics_report`.
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TOP_DUPLICATES = 5
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+_NUMBER_RE = re.compile(r'\b\d+(\.\d+)?\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r'\bIN \((\?(, )?)+\)')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def fingerprint(sql):
+    """SQL with literals replaced, so the same query with other params matches."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.external = defaultdict(float)
+        self.external_calls = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    def server_timing(self, duration):
+        parts = [f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"']
+        for service, seconds in sorted(self.external.items()):
+            parts.append(f'{service};dur={seconds * 1000:.1f}')
+        parts.append(f'total;dur={duration * 1000:.1f}')
+        return ', '.join(parts)
+
+
+class Registry:
+    """Process-wide totals. Every worker process keeps its own."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()
+        self.latency_sum = defaultdict(float)
+        self.latency_buckets = defaultdict(Counter)
+        self.queries = Counter()
+        self.db_time = defaultdict(float)
+        self.duplicate_queries = Counter()
+        self.external_calls = Counter()
+        self.external_time = defaultdict(float)
+
+    def add_request(self, view, duration, metrics):
+        with self.lock:
+            self.requests[view] += 1
+            self.latency_sum[view] += duration
+            for bound in LATENCY_BUCKETS:
+                if duration <= bound:
+                    self.latency_buckets[view][bound] += 1
+            self.queries[view] += metrics.queries
+            self.db_time[view] += metrics.db_time
+            self.duplicate_queries[view] += sum(count - 1 for _, count in metrics.duplicates())
+
+    def add_external(self, service, duration):
+        with self.lock:
+            self.external_calls[service] += 1
+            self.external_time[service] += duration
+
+    def render(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        with self.lock:
+            views = sorted(self.requests)
+            histogram = []
+            for view in views:
+                for bound in LATENCY_BUCKETS:
+                    histogram.append(f'afc_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {self.latency_buckets[view][bound]}')
+                histogram.append(f'afc_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {self.requests[view]}')
+                histogram.append(f'afc_request_duration_seconds_sum{{view="{view}"}} {self.latency_sum[view]:.6f}')
+                histogram.append(f'afc_request_duration_seconds_count{{view="{view}"}} {self.requests[view]}')
+            metric('afc_request_duration_seconds', 'histogram', 'Request latency by view.', histogram)
+            metric('afc_db_queries_total', 'counter', 'Database queries by view.',
+                   [f'afc_db_queries_total{{view="{v}"}} {self.queries[v]}' for v in views])
+            metric('afc_db_query_seconds_total', 'counter', 'Time spent in database queries by view.',
+                   [f'afc_db_query_seconds_total{{view="{v}"}} {self.db_time[v]:.6f}' for v in views])
+            metric('afc_duplicate_queries_total', 'counter', 'Repeated identical queries (N+1 candidates) by view.',
+                   [f'afc_duplicate_queries_total{{view="{v}"}} {self.duplicate_queries[v]}' for v in views])
+            services = sorted(self.external_calls)
+            metric('afc_external_calls_total', 'counter', 'Calls to external services.',
+                   [f'afc_external_calls_total{{service="{s}"}} {self.external_calls[s]}' for s in services])
+            metric('afc_external_call_seconds_total', 'counter', 'Time spent calling external services.',
+                   [f'afc_external_call_seconds_total{{service="{s}"}} {self.external_time[s]:.6f}' for s in services])
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+@contextmanager
+def external_call(service):
+    """Time a call to Razorpay, SMTP etc. against the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        registry.add_external(service, duration)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.external[service] += duration
+            metrics.external_calls[service] += 1
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        duration = time.perf_counter() - metrics.started
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else '<unresolved>'
+        registry.add_request(view, duration, metrics)
+
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(duration)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'ts': timezone.now().isoformat(),
+                'view': view,
+                'method': request.method,
+                'status': response.status_code,
+                'ms': round(duration * 1000, 2),
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'duplicates': metrics.duplicates()[:TOP_DUPLICATES],
+                'external_ms': {service: round(seconds * 1000, 2) for service, seconds in metrics.external.items()},
+            }))
+        return response
+
+
+def metrics_view(request):
+    # Staff, or a scraper sending "Authorization: Bearer <METRICS_TOKEN>"
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = request.user.is_staff or (token and constant_time_compare(header, f'Bearer {token}'))
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('status_changed', 'Status Changed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('status', models.CharField(choices=[('in_process', 'In Process'), ('on_way', 'On Way'), ('delivered', 'Delivered'), ('done', 'Done'), ('cancelled', 'Cancelled'), ('paid', 'Paid')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='core.order')),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_order_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('order__isnull', True)), fields=['user'], name='core_cart_active_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='items',
+            index=models.Index(fields=['category', 'id'], name='core_items_category_id_idx'),
+        ),
+    ]
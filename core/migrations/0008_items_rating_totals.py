@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-18 11:04
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def backfill_rating_totals(apps, schema_editor):
+    Items = apps.get_model('core', 'Items')
+    FooRating = apps.get_model('core', 'FooRating')
+    ratings = FooRating.objects.filter(menu=OuterRef('pk')).order_by().values('menu')
+    Items.objects.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count'),
+                                       output_field=IntegerField()), 0),
+    )
+    Items.objects.update(rating=Coalesce(
+        Cast(F('rating_sum'), FloatField()) / NullIf(F('rating_count'), Value(0)), Value(0.0)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='items',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='items',
+            name='rating_sum',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 11:10
+
+import core.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_items_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.images.get_image_storage, upload_to='static/images/'),
+        ),
+        migrations.AlterField(
+            model_name='items',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.images.get_image_storage, upload_to='static/images/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_image_content_hash_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='items',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models import Count, DecimalField, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.contrib.auth.models import User
-import random
 from decimal import Decimal
+from django.utils import timezone
 from users.models import CustomUser  # Adjust the import based on your user model location
+from .images import get_image_storage
+from .order_numbers import next_order_number
 # Create your models here.
 
 
@@ -10,7 +14,7 @@ from users.models import CustomUser  # Adjust the import based on your user mode
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='static/images/', blank=True, null=True)
+    image = models.ImageField(upload_to='static/images/', storage=get_image_storage, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -18,23 +22,42 @@ class Category(models.Model):
         return self.name
     
 
+def rating_average(total, count):
+    # SQL expression for total / count, 0 when there are no ratings
+    return Coalesce(Cast(total, FloatField()) / NullIf(count, Value(0)), Value(0.0))
+
+
 class Items(models.Model):
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)  # stable key for import_menu
     name = models.CharField(max_length=100)
     description = models.TextField()
-    image = models.ImageField(upload_to='static/images/', blank=True, null=True)
+    image = models.ImageField(upload_to='static/images/', storage=get_image_storage, blank=True, null=True)
     rating=models.FloatField(default=0.0)
+    rating_sum = models.BigIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     category = models.ForeignKey(Category, related_name='items', on_delete=models.CASCADE, null=True, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Category listings in menu order
+            models.Index(fields=['category', 'id'], name='core_items_category_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
     def update_rating(self):
-        foo_ratings = self.foo_ratings.all()  # Use related name
-        avg_rating = sum(r.rating for r in foo_ratings) / len(foo_ratings) if foo_ratings else 0
-        self.rating = avg_rating
-        self.save()
+        # Full recount; FooRating changes normally go through core.ratings in O(1)
+        totals = self.foo_ratings.aggregate(total=Sum('rating'), count=Count('id'))
+        self.rating_sum = totals['total'] or 0
+        self.rating_count = totals['count']
+        self.rating = self.rating_sum / self.rating_count if self.rating_count else 0.0
+        # update() rather than save() so updated_at (and the menu cache) stay put
+        Items.objects.filter(pk=self.pk).update(
+            rating_sum=self.rating_sum, rating_count=self.rating_count, rating=self.rating
+        )
     
 
 
@@ -61,7 +84,7 @@ class Order(models.Model):
         ('paid', 'Paid'),
     ]  
 
-    order_number = models.CharField(max_length=1000, unique=True)  
+    order_number = models.CharField(max_length=20, unique=True)  
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)  
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)  
     status = models.CharField(max_length=10, choices=ORDER_STATUS, default='in_process')  
@@ -72,10 +95,24 @@ class Order(models.Model):
     refund_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     refund_status = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Order history (my_orders) and the kitchen board, newest first
+            models.Index(fields=['user', 'created_at'], name='core_order_user_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='core_order_status_created_idx'),
+        ]
+        constraints = [
+            # One order per captured payment, so repeated callbacks can't duplicate it
+            models.UniqueConstraint(
+                fields=['razorpay_payment_id'],
+                condition=models.Q(razorpay_payment_id__isnull=False),
+                name='unique_order_razorpay_payment_id',
+            ),
+        ]
 
     def save(self, *args, **kwargs):  
         if not self.order_number:  
-            self.order_number = str(random.randint(10000, 99999))  # Generate random 5-digit order number  
+            self.order_number = next_order_number()  # e.g. 26101800000042, see core.order_numbers
         super(Order, self).save(*args, **kwargs)  
 
     def __str__(self):  
@@ -83,17 +120,42 @@ class Order(models.Model):
 
 
 
+class OrderNumberSequence(models.Model):
+    # Source of order numbers; processes reserve them a block at a time
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
 class Cart(models.Model):  
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)  
     items = models.ManyToManyField(Items, through='CartItem')  
     created_at = models.DateTimeField(auto_now_add=True)  
     order = models.OneToOneField(Order, on_delete=models.CASCADE, null=True, blank=True, related_name='carts')  
 
+    class Meta:
+        indexes = [
+            # Every request looks up the user's active cart (order IS NULL)
+            models.Index(fields=['user'], condition=models.Q(order__isnull=True), name='core_cart_active_user_idx'),
+        ]
+
+    def totals(self):
+        # One aggregate query for the whole cart instead of a query per line
+        totals = self.cart_items.aggregate(
+            total_price=Sum(F('quantity') * F('menu_item__price'),
+                            output_field=DecimalField(max_digits=12, decimal_places=2)),
+            total_quantity=Sum('quantity'),
+        )
+        total_price = totals['total_price'] or Decimal('0.00')
+        return {
+            'total_price': total_price.quantize(Decimal('0.01')),
+            'total_quantity': totals['total_quantity'] or 0,
+        }
+
     def total_price(self):  
-        total = Decimal('0.00')  # Initialize as Decimal  
-        for cart_item in self.cart_items.all():  
-            total += cart_item.total_price()  # Ensure total_price() returns a Decimal  
-        return total  
+        return self.totals()['total_price']
 
     def __str__(self):  
         return f"Cart for {self.user.username}" + (f" - Order {self.order.order_number}" if self.order else "")  
@@ -119,4 +181,105 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)  # single item price
 
     def total_price(self):
-        return self.quantity * self.price
\ No newline at end of file
+        return self.quantity * self.price
+
+
+class Job(models.Model):
+    # Background work (refunds, emails) picked up by `manage.py run_jobs`
+    JOB_STATUS = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=JOB_STATUS, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='core_job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+
+class OrderEvent(models.Model):
+    # Append-only log streamed to the kitchen board (see core.order_events)
+    EVENT_KINDS = [
+        ('created', 'Created'),
+        ('status_changed', 'Status Changed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=20, choices=EVENT_KINDS)
+    status = models.CharField(max_length=10, choices=Order.ORDER_STATUS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind} - Order {self.order_id} ({self.status})"
+
+
+class SalesRollup(models.Model):
+    # Hourly and daily sales totals kept up to date by core.rollups
+    PERIODS = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    period = models.CharField(max_length=4, choices=PERIODS)
+    bucket = models.DateTimeField()
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    items_sold = models.PositiveIntegerField(default=0)
+    cancellations = models.PositiveIntegerField(default=0)
+    refunds = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'bucket'], name='core_salesrollup_period_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class ProductSalesRollup(models.Model):
+    # Per-item quantities for the same buckets; category totals group these
+    period = models.CharField(max_length=4, choices=SalesRollup.PERIODS)
+    bucket = models.DateTimeField()
+    product = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelled_quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'bucket', 'product'], name='core_productsalesrollup_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'bucket', 'category'], name='core_productrollup_cat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.period} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class RollupCursor(models.Model):
+    # Last OrderEvent folded into the rollups
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_event_id}"
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Max, Prefetch
+
+from .models import Order, OrderEvent, OrderItem
+from .rollups import ROLLUP_KINDS, schedule_update
+
+POLL_INTERVAL = 1.0  # picks up events written by other processes
+KEEPALIVE_EVERY = 15
+SYNC_RETRY_MS = 2000  # reconnect delay for the WSGI stream
+BOARD_PAGE_SIZE = 50
+
+
+class _Hub:
+    """Wakes up the event streams of this process as soon as an event commits."""
+
+    def __init__(self):
+        self._waiters = set()
+        self._lock = threading.Lock()
+
+    async def wait(self, timeout):
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(entry)
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(entry)
+
+    def notify(self):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+
+hub = _Hub()
+
+
+def publish(order, kind):
+    # Written in the caller's transaction; streams are poked once it commits
+    OrderEvent.objects.create(order=order, kind=kind, status=order.status)
+    if kind in ROLLUP_KINDS:
+        # Sales rollups catch up off the request path once the event settles
+        schedule_update()
+    transaction.on_commit(hub.notify)
+
+
+def publish_many(order_ids, kind, status):
+    # publish() for a batch of orders that all moved to `status`, in one INSERT
+    events = OrderEvent.objects.bulk_create(
+        OrderEvent(order_id=order_id, kind=kind, status=status) for order_id in order_ids
+    )
+    if events:
+        if kind in ROLLUP_KINDS:
+            schedule_update()
+        transaction.on_commit(hub.notify)
+    return events
+
+
+def board_orders():
+    return Order.objects.filter(status='in_process').order_by('-created_at').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+    )
+
+
+def serialize_order(order):
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'status': order.status,
+        'created_at': order.created_at.isoformat(),
+        'items': [{'name': item.product.name, 'quantity': item.quantity} for item in order.items.all()],
+    }
+
+
+def latest_event_id():
+    return OrderEvent.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def board_snapshot(limit=BOARD_PAGE_SIZE):
+    return [serialize_order(order) for order in board_orders()[:limit]]
+
+
+def events_after(event_id, limit=100):
+    events = list(OrderEvent.objects.filter(id__gt=event_id).order_by('id')[:limit])
+    created = {e.order_id for e in events if e.kind == 'created'}
+    orders = {o.id: o for o in board_orders().filter(id__in=created)} if created else {}
+
+    payloads = []
+    for event in events:
+        data = {'kind': event.kind, 'id': event.order_id, 'status': event.status}
+        if event.order_id in orders:
+            data['order'] = serialize_order(orders[event.order_id])
+        payloads.append((event.id, data))
+    return payloads
+
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream(last_event_id=None):
+    # Used under ASGI: one snapshot, then incremental events as they commit
+    if last_event_id is None:
+        last_event_id = await sync_to_async(latest_event_id)()
+        snapshot = await sync_to_async(board_snapshot)()
+        yield format_sse('snapshot', snapshot, last_event_id)
+
+    idle = 0
+    while True:
+        events = await sync_to_async(events_after)(last_event_id)
+        for event_id, data in events:
+            yield format_sse('order', data, event_id)
+            last_event_id = event_id
+        if events:
+            idle = 0
+            continue
+
+        await hub.wait(POLL_INTERVAL)
+        idle += POLL_INTERVAL
+        if idle >= KEEPALIVE_EVERY:
+            idle = 0
+            yield ": keepalive\n\n"
+
+
+def stream_sync(last_event_id=None):
+    # WSGI fallback (runserver, sync workers): a held-open stream would tie up
+    # a worker per open board, so send what is new and close. EventSource
+    # reconnects after `retry` with Last-Event-ID, which makes this a short poll.
+    yield f"retry: {SYNC_RETRY_MS}\n\n"
+    if last_event_id is None:
+        last_event_id = latest_event_id()
+        yield format_sse('snapshot', board_snapshot(), last_event_id)
+        return
+
+    for event_id, data in events_after(last_event_id):
+        yield format_sse('order', data, event_id)
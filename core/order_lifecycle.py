@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from .jobs import enqueue
+from .models import Order
+from .order_events import publish_many
+
+# Order status changes. Every move is a conditional
+# UPDATE ... WHERE status IN (<statuses allowed to move there>), so two
+# tablets racing on the same order can't both win, and nothing is read
+# first and written back. Statuses missing from a list can't be reached.
+TRANSITIONS = {
+    'paid': ('in_process', 'cancelled'),
+    'in_process': ('done', 'on_way', 'cancelled'),
+    'done': ('on_way', 'delivered'),  # prepared in the kitchen
+    'on_way': ('delivered',),
+    'delivered': (),
+    'cancelled': (),
+}
+
+# What a customer may set on their own order through update_order_status:
+# confirming it arrived. Cancelling goes through cancel_order; everything
+# else is the kitchen's.
+CUSTOMER_TARGETS = ('delivered',)
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def sources(status):
+    """Statuses an order may be in to move to `status`."""
+    return [source for source, targets in TRANSITIONS.items() if status in targets]
+
+
+def conditions(status):
+    allowed = sources(status)
+    if not allowed:
+        raise InvalidTransition(f"Orders can't be moved to {status!r}")
+    condition = Q(status__in=allowed)
+    if status == 'cancelled':
+        condition &= Q(razorpay_payment_id__isnull=False)  # something to refund
+    return condition
+
+
+def changes(status):
+    if status == 'cancelled':
+        # Full refund; the gateway call runs in the refund_order job
+        return {'status': status, 'refund_amount': F('total_amount'), 'refund_status': 'pending'}
+    return {'status': status}
+
+
+def moved(order_ids, status):
+    if status == 'cancelled':
+        publish_many(order_ids, 'cancelled', status)
+        for order_id in order_ids:
+            enqueue('refund_order', order_id=order_id)
+    else:
+        publish_many(order_ids, 'status_changed', status)
+
+
+def transition(order_id, status, **filters):
+    """Move one order to `status` in a single UPDATE. `filters` narrow the
+    match (e.g. user=...). Returns False if no matching order could move."""
+    condition = conditions(status)
+    with transaction.atomic():
+        updated = Order.objects.filter(condition, pk=order_id, **filters).update(**changes(status))
+        if updated:
+            moved([order_id], status)
+    return bool(updated)
+
+
+def bulk_transition(queryset, status):
+    """Move every order in `queryset` that may reach `status`, e.g. all done
+    orders to delivered. Returns the ids that moved."""
+    condition = conditions(status)
+    with transaction.atomic():
+        # Lock the rows first so the events match exactly what the UPDATE changed
+        order_ids = list(queryset.filter(condition).select_related(None).order_by()
+                         .select_for_update().values_list('id', flat=True))
+        if order_ids:
+            Order.objects.filter(condition, pk__in=order_ids).update(**changes(status))
+            moved(order_ids, status)
+    return order_ids
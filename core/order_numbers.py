@@ -0,0 +1,59 @@
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class OrderNumberAllocator:
+    """Hands out order numbers from blocks reserved in OrderNumberSequence.
+
+    A process reserves ``block_size`` numbers with one UPDATE and then serves
+    them from memory, so concurrent checkouts never collide and never retry.
+    Numbers are prefixed with the date (YYMMDD) to keep them sortable by time.
+    """
+
+    def __init__(self, name='order', block_size=None):
+        self.name = name
+        self.block_size = block_size or settings.ORDER_NUMBER_BLOCK_SIZE
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _reserve_block(self):
+        Sequence = apps.get_model('core', 'OrderNumberSequence')
+        with transaction.atomic():
+            Sequence.objects.get_or_create(name=self.name)
+            Sequence.objects.filter(name=self.name).update(last_value=F('last_value') + self.block_size)
+            last_value = Sequence.objects.values_list('last_value', flat=True).get(name=self.name)
+        return last_value - self.block_size + 1, last_value + 1
+
+    def _install_block(self, start, end):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = start, end
+
+    def next_value(self):
+        with self._lock:
+            if self._next < self._end:
+                value = self._next
+                self._next += 1
+                return value
+
+        start, end = self._reserve_block()
+        # The rest of the block is only ours once the reservation commits; if the
+        # surrounding transaction rolls back it is dropped along with this number.
+        transaction.on_commit(lambda: self._install_block(start + 1, end))
+        return start
+
+    def next_number(self):
+        return f"{timezone.now():%y%m%d}{self.next_value():08d}"
+
+
+_allocator = OrderNumberAllocator()
+
+
+def next_order_number():
+    return _allocator.next_number()
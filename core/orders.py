@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from .jobs import enqueue
+from .models import Cart, Order, OrderItem
+from .order_events import publish
+
+
+class PaymentAlreadyUsed(Exception):
+    """The payment id is already attached to another user's order."""
+
+
+def materialize_order(user, razorpay_payment_id):
+    """Turn the user's active cart into a paid order.
+
+    Returns ``(order, created)``. A payment id that already has an order
+    returns that order, so repeated gateway callbacks are harmless. Raises
+    ``Cart.DoesNotExist`` when there is no active cart and
+    ``PaymentAlreadyUsed`` when another user's order has the payment id.
+    """
+    if razorpay_payment_id:
+        existing = Order.objects.filter(user=user, razorpay_payment_id=razorpay_payment_id).first()
+        if existing:
+            return existing, False
+
+    try:
+        with transaction.atomic():
+            cart = Cart.objects.select_for_update().filter(user=user, order__isnull=True).first()
+            if cart is None:
+                raise Cart.DoesNotExist("No active cart found")
+
+            lines = list(cart.cart_items.select_related('menu_item'))
+            total_amount = sum((line.total_price() for line in lines), Decimal('0.00'))
+
+            order = Order.objects.create(
+                user=user,
+                total_amount=total_amount,
+                status='in_process',
+                status_pay='PAID',
+                razorpay_payment_id=razorpay_payment_id or None,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=line.menu_item,
+                    quantity=line.quantity,
+                    price=line.total_price(),
+                )
+                for line in lines
+            ])
+
+            # Cart lines go with the cart (on_delete=CASCADE)
+            cart.delete()
+
+            enqueue('send_order_receipt', order_id=order.pk)
+            publish(order, 'created')
+    except IntegrityError:
+        # A concurrent callback for the same payment won the race
+        if not razorpay_payment_id:
+            raise
+        existing = Order.objects.filter(user=user, razorpay_payment_id=razorpay_payment_id).first()
+        if existing is None:
+            raise PaymentAlreadyUsed(razorpay_payment_id)
+        return existing, False
+
+    return order, True
@@ -0,0 +1,105 @@
+import hashlib
+import itertools
+import threading
+
+import razorpay
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+from .metrics import external_call
+
+# Gateway orders are reused while the cart and amount stay the same, so
+# reloading the cart page doesn't create a new Razorpay order every time.
+ORDER_CACHE_KEY = 'payments:order:{}'
+ORDER_CACHE_TIMEOUT = 60 * 30
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class FakeRazorpayClient:
+    """In-process stand-in for razorpay.Client (PAYMENT_GATEWAY = 'fake')."""
+
+    def __init__(self):
+        self.order = _FakeOrders()
+        self.payment = _FakePayments()
+
+
+class _FakeOrders:
+    def __init__(self):
+        self.created = []
+        self._ids = itertools.count(1)
+
+    def create(self, data=None, **kwargs):
+        order = dict(data or {}, id=f'order_fake{next(self._ids)}', status='created')
+        self.created.append(order)
+        return order
+
+
+class _FakePayments:
+    def __init__(self):
+        self.refunds = []
+        self._ids = itertools.count(1)
+
+    def refund(self, payment_id, data=None, **kwargs):
+        if not payment_id:
+            raise razorpay.errors.BadRequestError('The id provided does not exist')
+        refund = dict(data or {}, id=f'rfnd_fake{next(self._ids)}', payment_id=payment_id, status='processed')
+        self.refunds.append(refund)
+        return refund
+
+
+def _build_client():
+    if settings.PAYMENT_GATEWAY == 'fake':
+        return FakeRazorpayClient()
+
+    # One keep-alive session shared by every request in this process
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.RAZORPAY_POOL_SIZE)
+    session.mount('https://', adapter)
+    return razorpay.Client(session=session, auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def reset_client():
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def cart_fingerprint(cart, quantities):
+    lines = ','.join(f'{item_id}x{quantity}' for item_id, quantity in sorted(quantities.items()))
+    return f'{cart.user_id}:{cart.pk}:{lines}'
+
+
+def create_order(amount_paise, fingerprint, currency='INR'):
+    digest = hashlib.sha256(f'{fingerprint}:{amount_paise}:{currency}'.encode()).hexdigest()
+    key = ORDER_CACHE_KEY.format(digest)
+
+    order = cache.get(key)
+    if order is None:
+        with external_call('razorpay'):
+            order = get_client().order.create(data={
+                'amount': amount_paise,
+                'currency': currency,
+                'payment_capture': '1'
+            })
+        cache.set(key, order, ORDER_CACHE_TIMEOUT)
+    return order
+
+
+def refund_payment(payment_id, amount_paise):
+    with external_call('razorpay'):
+        return get_client().payment.refund(payment_id, {
+            "amount": amount_paise
+        })
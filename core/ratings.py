@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import FooRating, Items, rating_average
+
+
+def apply_rating_delta(item_id, delta_sum, delta_count):
+    # One UPDATE; SET expressions all see the row as it was before this statement
+    new_sum = F('rating_sum') + delta_sum
+    new_count = F('rating_count') + delta_count
+    Items.objects.filter(pk=item_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=rating_average(new_sum, new_count),
+    )
+
+
+def remember_stored_rating(instance):
+    # (menu_id, rating) as currently stored, read by primary key before a write
+    instance._stored_rating = None
+    if instance.pk is not None:
+        instance._stored_rating = FooRating.objects.filter(pk=instance.pk).values_list('menu_id', 'rating').first()
+
+
+def rating_saved(instance):
+    stored = getattr(instance, '_stored_rating', None)
+    if stored is None:
+        apply_rating_delta(instance.menu_id, instance.rating, 1)
+    elif stored[0] != instance.menu_id:
+        apply_rating_delta(stored[0], -stored[1], -1)
+        apply_rating_delta(instance.menu_id, instance.rating, 1)
+    elif stored[1] != instance.rating:
+        apply_rating_delta(instance.menu_id, instance.rating - stored[1], 0)
+
+
+def rating_deleted(instance):
+    stored = getattr(instance, '_stored_rating', None)
+    if stored is not None:
+        apply_rating_delta(stored[0], -stored[1], -1)
+
+
+def rebuild_rating_totals(items=None):
+    # Recount every item with two set-based UPDATEs (no rows pulled into Python)
+    items = Items.objects.all() if items is None else items
+    ratings = FooRating.objects.filter(menu=OuterRef('pk')).order_by().values('menu')
+    with transaction.atomic():
+        updated = items.update(
+            rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+            rating_count=Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count'),
+                                           output_field=IntegerField()), 0),
+        )
+        items.update(rating=rating_average(F('rating_sum'), F('rating_count')))
+    return updated
@@ -0,0 +1,222 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import Job, Order, OrderEvent, OrderItem, ProductSalesRollup, RollupCursor, SalesRollup
+
+# Hourly/daily sales rollups. Orders are never aggregated on request: the
+# `update_sales_rollups` job folds new OrderEvents into the rollup rows, and
+# `manage.py backfill_sales_rollups` rebuilds them from the order history.
+# Sales land in the bucket the order was placed in, cancellations and
+# refunds in the bucket they happened in.
+CURSOR = 'sales'
+BATCH_SIZE = 500
+# Event ids are handed out before commit, so a later id can become visible
+# first. Events younger than this are left for the next run.
+SETTLE = timedelta(seconds=5)
+ROLLUP_KINDS = ('created', 'cancelled')
+UPDATE_JOB = 'update_sales_rollups'
+# Twice the settle time, so one job covers the checkouts of the next few seconds
+UPDATE_DELAY = SETTLE * 2
+
+SALES_FIELDS = ['orders', 'revenue', 'items_sold', 'cancellations', 'refunds']
+PRODUCT_FIELDS = ['quantity', 'revenue', 'cancelled_quantity']
+
+
+def buckets(moment):
+    hour = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return (('hour', hour), ('day', hour.replace(hour=0)))
+
+
+class Deltas:
+    """Increments for the rollup rows, collected in memory and written in
+    one pass so a batch touches each row once."""
+
+    def __init__(self):
+        self.sales = defaultdict(Counter)
+        self.products = defaultdict(Counter)
+        self.categories = {}
+
+    def sale(self, moment, total, lines):
+        for period, bucket in buckets(moment):
+            totals = self.sales[(period, bucket)]
+            totals['orders'] += 1
+            totals['revenue'] += total
+            for product_id, category_id, quantity, price in lines:
+                totals['items_sold'] += quantity
+                product = self.products[(period, bucket, product_id)]
+                product['quantity'] += quantity
+                product['revenue'] += price
+                self.categories[product_id] = category_id
+
+    def cancellation(self, moment, refund, lines):
+        for period, bucket in buckets(moment):
+            totals = self.sales[(period, bucket)]
+            totals['cancellations'] += 1
+            totals['refunds'] += refund
+            for product_id, category_id, quantity, price in lines:
+                self.products[(period, bucket, product_id)]['cancelled_quantity'] += quantity
+                self.categories[product_id] = category_id
+
+    def apply(self):
+        # Read-modify-write: callers hold the cursor lock, so nobody else
+        # is adding to these rows at the same time
+        if self.sales:
+            existing = SalesRollup.objects.filter(bucket__in={bucket for _, bucket in self.sales})
+            merge(SalesRollup, self.sales, SALES_FIELDS,
+                  {(row.period, row.bucket): row for row in existing},
+                  lambda period, bucket: SalesRollup(period=period, bucket=bucket))
+        if self.products:
+            existing = ProductSalesRollup.objects.filter(
+                bucket__in={key[1] for key in self.products},
+                product_id__in={key[2] for key in self.products},
+            )
+            merge(ProductSalesRollup, self.products, PRODUCT_FIELDS,
+                  {(row.period, row.bucket, row.product_id): row for row in existing},
+                  lambda period, bucket, product_id: ProductSalesRollup(
+                      period=period, bucket=bucket, product_id=product_id,
+                      category_id=self.categories.get(product_id)))
+
+
+def merge(model, deltas, fields, existing, new_row):
+    created, updated = [], []
+    for key, values in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            row = new_row(*key)
+            created.append(row)
+        else:
+            updated.append(row)
+        for field in fields:
+            setattr(row, field, getattr(row, field) + values[field])
+    model.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    model.objects.bulk_update(updated, fields, batch_size=BATCH_SIZE)
+
+
+def order_lines(order_ids):
+    lines = defaultdict(list)
+    rows = OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        'order_id', 'product_id', 'product__category_id', 'quantity', 'price')
+    for order_id, *line in rows:
+        lines[order_id].append(line)
+    return lines
+
+
+def lock_cursor():
+    RollupCursor.objects.get_or_create(name=CURSOR)
+    return RollupCursor.objects.select_for_update().get(name=CURSOR)
+
+
+def schedule_update():
+    # Checked once the caller commits: a job waiting to run at least SETTLE
+    # from now will see the new event settled, so a burst of checkouts
+    # shares one. A job due sooner may already be past its last look.
+    def queue():
+        due = timezone.now() + SETTLE
+        if not Job.objects.filter(name=UPDATE_JOB, status='pending', run_after__gte=due).exists():
+            enqueue(UPDATE_JOB, delay=UPDATE_DELAY.total_seconds())
+    transaction.on_commit(queue)
+
+
+def catch_up():
+    while update_rollups():
+        pass
+    # Events still settling were skipped; make sure a job looks again once
+    # they have settled
+    cursor = RollupCursor.objects.filter(name=CURSOR).values_list('last_event_id', flat=True).first() or 0
+    if OrderEvent.objects.filter(id__gt=cursor, kind__in=ROLLUP_KINDS).exists():
+        schedule_update()
+
+
+def update_rollups(limit=BATCH_SIZE):
+    """Fold settled OrderEvents past the cursor into the rollups. Returns
+    the number of events read."""
+    with transaction.atomic():
+        cursor = lock_cursor()
+        events = list(OrderEvent.objects.filter(
+            id__gt=cursor.last_event_id, created_at__lte=timezone.now() - SETTLE,
+        ).order_by('id').values_list('id', 'order_id', 'kind', 'created_at')[:limit])
+        if not events:
+            return 0
+
+        wanted = {order_id for _, order_id, kind, _ in events if kind in ROLLUP_KINDS}
+        orders = {order['id']: order for order in Order.objects.filter(id__in=wanted).values(
+            'id', 'created_at', 'total_amount', 'refund_amount')}
+        lines = order_lines(wanted)
+
+        deltas = Deltas()
+        for _, order_id, kind, created_at in events:
+            order = orders.get(order_id)
+            if order is None:
+                continue
+            if kind == 'created':
+                deltas.sale(order['created_at'], order['total_amount'], lines[order_id])
+            elif kind == 'cancelled':
+                refund = order['refund_amount'] if order['refund_amount'] is not None else order['total_amount']
+                deltas.cancellation(created_at, refund, lines[order_id])
+        deltas.apply()
+
+        cursor.last_event_id = events[-1][0]
+        cursor.save(update_fields=['last_event_id'])
+    return len(events)
+
+
+def backfill(chunk_size=2000):
+    """Rebuild the rollups from Order/OrderItem, one transaction per chunk of
+    orders, yielding the number of orders done so far.
+
+    Events up to the cursor position taken here are counted from the order
+    table; later ones are left to update_rollups, which may keep running.
+    """
+    with transaction.atomic():
+        cursor = lock_cursor()
+        settled = OrderEvent.objects.filter(created_at__lte=timezone.now() - SETTLE)
+        cursor.last_event_id = settled.aggregate(last=Max('id'))['last'] or 0
+        cursor.save(update_fields=['last_event_id'])
+        SalesRollup.objects.all().delete()
+        ProductSalesRollup.objects.all().delete()
+    cutoff = cursor.last_event_id
+    # Read after the cutoff, so every order with an event <= cutoff is included
+    last_order = Order.objects.aggregate(last=Max('id'))['last'] or 0
+
+    done = 0
+    after = 0
+    while True:
+        with transaction.atomic():
+            lock_cursor()
+            orders = list(Order.objects.filter(id__gt=after, id__lte=last_order).order_by('id').values(
+                'id', 'created_at', 'status', 'total_amount', 'refund_amount')[:chunk_size])
+            if not orders:
+                break
+            ids = [order['id'] for order in orders]
+            events = defaultdict(list)
+            for order_id, event_id, kind, created_at in OrderEvent.objects.filter(
+                order_id__in=ids, kind__in=ROLLUP_KINDS,
+            ).order_by('id').values_list('order_id', 'id', 'kind', 'created_at'):
+                events[order_id].append((event_id, kind, created_at))
+            lines = order_lines(ids)
+
+            deltas = Deltas()
+            for order in orders:
+                order_events = events[order['id']]
+                # Orders from before the event log have no events at all
+                if not any(kind == 'created' and event_id > cutoff for event_id, kind, _ in order_events):
+                    deltas.sale(order['created_at'], order['total_amount'], lines[order['id']])
+
+                cancels = [(event_id, created_at) for event_id, kind, created_at in order_events if kind == 'cancelled']
+                refund = order['refund_amount'] if order['refund_amount'] is not None else order['total_amount']
+                if cancels:
+                    event_id, created_at = cancels[0]
+                    if event_id <= cutoff:
+                        deltas.cancellation(created_at, refund, lines[order['id']])
+                elif order['status'] == 'cancelled':
+                    deltas.cancellation(order['created_at'], refund, lines[order['id']])
+            deltas.apply()
+
+        after = ids[-1]
+        done += len(orders)
+        yield done
@@ -0,0 +1,90 @@
+import bisect
+import heapq
+import re
+import threading
+
+from .menu_cache import get_menu_snapshot
+
+# In-memory inverted index over the menu snapshot. It is rebuilt in-process
+# whenever the catalog version changes, so lookups never touch the database.
+TOKEN_RE = re.compile(r'\w+')
+FIELD_WEIGHTS = (('name', 3.0), ('category', 2.0), ('description', 1.0))
+PREFIX_WEIGHT = 0.5   # a prefix match counts half of an exact match
+MAX_EXPANSIONS = 50   # vocabulary terms a single prefix may expand to
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class MenuIndex:
+    def __init__(self, snapshot):
+        self.version = snapshot['version']
+        self.items = {}
+        self.postings = {}
+
+        for item in snapshot['items']:
+            category = snapshot['categories_by_id'].get(item['category_id'])
+            fields = {
+                'name': item['name'],
+                'category': category['name'] if category else '',
+                'description': item['description'],
+            }
+            self.items[item['id']] = dict(item, category=fields['category'])
+            for field, weight in FIELD_WEIGHTS:
+                for token in tokenize(fields[field]):
+                    scores = self.postings.setdefault(token, {})
+                    scores[item['id']] = scores.get(item['id'], 0.0) + weight
+
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, token):
+        # Exact term first, then up to MAX_EXPANSIONS longer terms sharing the prefix
+        start = bisect.bisect_left(self.vocabulary, token)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            terms.append((term, 1.0 if term == token else PREFIX_WEIGHT))
+        return terms
+
+    def search(self, query, limit=10):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term, factor in self._expand(token):
+                for item_id, score in self.postings[term].items():
+                    token_scores[item_id] = token_scores.get(item_id, 0.0) + score * factor
+            if scores is None:
+                scores = token_scores
+            else:
+                # Every query word has to match
+                scores = {item_id: scores[item_id] + s for item_id, s in token_scores.items() if item_id in scores}
+            if not scores:
+                return []
+
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda pair: (-pair[1], self.items[pair[0]]['name']))
+        return [(self.items[item_id], score) for item_id, score in ranked]
+
+
+def get_index():
+    global _index
+    snapshot = get_menu_snapshot()
+    index = _index
+    if index is None or index.version != snapshot['version']:
+        with _index_lock:
+            if _index is None or _index.version != snapshot['version']:
+                _index = MenuIndex(snapshot)
+            index = _index
+    return index
+
+
+def search_menu(query, limit=10):
+    return get_index().search(query, limit)
@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .images import has_renditions
+from .jobs import enqueue
+from .menu_cache import bump_catalog_version
+from .models import Category, FooRating, Items
+from .ratings import rating_deleted, rating_saved, remember_stored_rating
+
+
+@receiver(post_save, sender=Items)
+@receiver(post_delete, sender=Items)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_menu_snapshot(sender, **kwargs):
+    # Bump after commit so nobody rebuilds the new version from old rows
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Items)
+@receiver(post_save, sender=Category)
+def queue_image_renditions(sender, instance, **kwargs):
+    if instance.image and not has_renditions(instance.image.name):
+        enqueue('generate_renditions', image=instance.image.name)
+
+
+@receiver(pre_save, sender=FooRating)
+@receiver(pre_delete, sender=FooRating)
+def read_stored_rating(sender, instance, **kwargs):
+    remember_stored_rating(instance)
+
+
+@receiver(post_save, sender=FooRating)
+def apply_saved_rating(sender, instance, **kwargs):
+    rating_saved(instance)
+
+
+@receiver(post_delete, sender=FooRating)
+def apply_deleted_rating(sender, instance, **kwargs):
+    rating_deleted(instance)
@@ -0,0 +1,74 @@
+import logging
+
+import razorpay
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from .images import generate_renditions
+from .jobs import job
+from .mail import deliver, deserialize_message
+from .menu_cache import bump_catalog_version
+from .models import Category, Items, Order
+from .payments import refund_payment
+from .rollups import catch_up
+
+logger = logging.getLogger(__name__)
+
+
+@job('send_email')
+def send_email(message):
+    deliver(deserialize_message(message))
+
+
+@job('send_order_receipt')
+def send_order_receipt(order_id):
+    order = Order.objects.select_related('user').get(pk=order_id)
+    if not order.user.email:
+        return
+
+    lines = [
+        f"{item.product.name} x {item.quantity}  ₹{item.price}"
+        for item in order.items.select_related('product')
+    ]
+    body = "\n".join([
+        f"Thanks for your order, {order.user.username}!",
+        "",
+        f"Order #{order.order_number}",
+        *lines,
+        "",
+        f"Total: ₹{order.total_amount}",
+    ])
+    deliver(EmailMessage(subject=f"AFC order #{order.order_number}", body=body, to=[order.user.email]))
+
+
+@job('generate_renditions')
+def generate_image_renditions(image):
+    generate_renditions(image)
+    # Touch the rows using the image so their cached cards are re-rendered,
+    # then rebuild the menu snapshot so they pick up the new srcsets
+    now = timezone.now()
+    Items.objects.filter(image=image).update(updated_at=now)
+    Category.objects.filter(image=image).update(updated_at=now)
+    bump_catalog_version()
+
+
+@job('refund_order')
+def refund_order(order_id):
+    order = Order.objects.get(pk=order_id)
+    if order.refund_id:
+        return  # already refunded by an earlier attempt
+
+    try:
+        refund = refund_payment(order.razorpay_payment_id, int(order.refund_amount * 100))
+    except razorpay.errors.BadRequestError:
+        # The gateway rejected it; retrying won't help
+        logger.exception("Refund for order %s rejected", order.order_number)
+        Order.objects.filter(pk=order.pk).update(refund_status='failed')
+        return
+
+    Order.objects.filter(pk=order.pk).update(refund_id=refund.get("id"), refund_status=refund.get("status"))
+
+
+@job('update_sales_rollups')
+def update_sales_rollups():
+    catch_up()
@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+# Rendered catalog cards, cached per item and its updated_at, so a menu page
+# is one cache.get_many() instead of re-rendering every card. The per-user
+# cart quantity is swapped in afterwards for the slot marker.
+CARD_KEY = 'card:{}:{}:{}'
+QUANTITY_SLOT = '<!--quantity-->'
+
+
+def card_key(template_name, entry):
+    return CARD_KEY.format(template_name, entry['id'], entry['updated_at'].timestamp())
+
+
+@register.simple_tag(takes_context=True)
+def catalog_cards(context, entries, template_name, cart_quantities=None):
+    keys = [card_key(template_name, entry) for entry in entries]
+    cached = cache.get_many(keys)
+
+    card_template = None
+    rendered = {}
+    cards = []
+    for key, entry in zip(keys, entries):
+        html = cached.get(key)
+        if html is None:
+            if card_template is None:
+                card_template = context.template.engine.get_template(template_name)
+            html = card_template.render(template.Context(
+                {'item': entry, 'quantity_slot': mark_safe(QUANTITY_SLOT)}, autoescape=context.autoescape,
+            ))
+            rendered[key] = html
+        if cart_quantities is not None:
+            html = html.replace(QUANTITY_SLOT, str(cart_quantities.get(entry['id'], 0)), 1)
+        cards.append(html)
+
+    if rendered:
+        cache.set_many(rendered, settings.MENU_CACHE_TIMEOUT)
+    return mark_safe(''.join(cards))
@@ -0,0 +1,31 @@
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 576px) 100vw, (max-width: 992px) 50vw, 33vw'
+
+
+@register.simple_tag
+def responsive_image(entry, alt='', css_class='', sizes=DEFAULT_SIZES, lazy=True):
+    """<picture> for a menu snapshot entry: WebP and JPEG srcsets with the
+    original upload as fallback."""
+    if not entry.get('image_url'):
+        return ''
+
+    img = format_html(
+        '<img src="{}"{}{} sizes="{}" alt="{}" class="{}"{} decoding="async">',
+        entry['image_url'],
+        format_html(' srcset="{}"', entry['image_srcset']) if entry.get('image_srcset') else '',
+        format_html(' width="{}" height="{}"', entry['image_width'], entry['image_height']) if entry.get('image_width') else '',
+        sizes,
+        alt,
+        css_class,
+        format_html(' loading="lazy"') if lazy else '',
+    )
+    if not entry.get('image_webp_srcset'):
+        return format_html('<picture>{}</picture>', img)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        entry['image_webp_srcset'], sizes, img,
+    )
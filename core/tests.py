@@ -1,3 +1,542 @@
-from django.test import TestCase
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from users.models import CustomUser
+
+from . import jobs, menu_cache, order_lifecycle, rollups
+from .cart_state import get_cart_quantities
+from .models import (
+    Cart, CartItem, Category, Items, Job, Order, OrderEvent, OrderItem, ProductSalesRollup, SalesRollup,
+)
+from .orders import PaymentAlreadyUsed, materialize_order
+from .pagination import keyset_page
+
+
+class MenuCacheTests(TestCase):
+    def test_bump_in_another_process_reaches_this_one(self):
+        # What import_menu, process_images and run_jobs do from their own process
+        before = menu_cache.get_menu_snapshot()['version']
+
+        subprocess.run(
+            [sys.executable, 'manage.py', 'shell', '-c',
+             'from core.menu_cache import bump_catalog_version; bump_catalog_version()'],
+            cwd=settings.BASE_DIR, check=True, capture_output=True,
+        )
+
+        self.assertNotEqual(menu_cache.get_menu_snapshot()['version'], before)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageRenditionTests(TestCase):
+    def test_rendition_job_reaches_the_menu_snapshot(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600)).save(buffer, 'PNG')
+        item = Items(name='Veg Burger', description='', price=90)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.image.save('burger.png', ContentFile(buffer.getvalue()))
+        self.assertEqual(menu_cache.get_menu_snapshot()['items'][0]['image_srcset'], '')
+
+        jobs.run_pending()
+
+        self.assertIn(' 320w', menu_cache.get_menu_snapshot()['items'][0]['image_srcset'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MenuImportExportTests(TestCase):
+    def setUp(self):
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'static/images'), exist_ok=True)
+        with open(os.path.join(settings.MEDIA_ROOT, 'static/images/cola.png'), 'wb') as f:
+            f.write(b'png')
+        self.burgers = Category.objects.create(name='Burgers')
+        self.plain = Items.objects.create(name='Veg Burger', description='Crispy patty', price=90, category=self.burgers)
+        self.with_sku = Items.objects.create(name='Cola', description='Chilled', price=40, sku='COLA', image='static/images/cola.png')
+        self.path = os.path.join(tempfile.mkdtemp(), 'menu.csv')
+
+    def import_rows(self, rows):
+        path = os.path.join(tempfile.mkdtemp(), 'menu.jsonl')
+        with open(path, 'w') as f:
+            f.writelines(json.dumps(row) + '\n' for row in rows)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_menu', path, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_export_then_import_changes_nothing(self):
+        call_command('export_menu', self.path, stderr=io.StringIO())
+        before = list(Items.objects.order_by('id').values_list('id', 'sku', 'name', 'description', 'price', 'category', 'image'))
+
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_menu', self.path, stdout=out, stderr=io.StringIO())
+
+        self.assertIn('1 upserted by sku, 1 updated by id, 0 inserted', out.getvalue())
+        self.assertIn('0 rows skipped', out.getvalue())
+        after = list(Items.objects.order_by('id').values_list('id', 'sku', 'name', 'description', 'price', 'category', 'image'))
+        self.assertEqual(after, before)
+
+    def test_blank_columns_keep_stored_values(self):
+        self.import_rows([
+            {'id': self.plain.pk, 'name': 'Veg Burger XL', 'price': '120'},
+            {'sku': 'COLA', 'name': 'Cola 500ml', 'price': '45'},
+        ])
+
+        self.plain.refresh_from_db()
+        self.with_sku.refresh_from_db()
+        self.assertEqual((self.plain.name, self.plain.description, self.plain.category_id),
+                         ('Veg Burger XL', 'Crispy patty', self.burgers.pk))
+        self.assertEqual((self.with_sku.name, self.with_sku.image.name), ('Cola 500ml', 'static/images/cola.png'))
+        self.assertEqual(Items.objects.count(), 2)
+
+    def test_rows_without_sku_or_id_are_inserted(self):
+        self.import_rows([{'name': 'Fries', 'price': '60', 'category': 'Sides'}])
+
+        fries = Items.objects.get(name='Fries')
+        self.assertEqual(fries.category.name, 'Sides')
+        self.assertEqual(Items.objects.count(), 3)
+
+    def test_unknown_id_is_skipped(self):
+        self.import_rows([{'id': 999999, 'name': 'Ghost', 'price': '1'}])
+
+        self.assertFalse(Items.objects.filter(name='Ghost').exists())
+
+    def test_non_object_lines_are_skipped(self):
+        self.import_rows([['Fries', 30], 5, {'name': 'Fries', 'price': 30}])
+
+        self.assertEqual(Items.objects.get(name='Fries').price, 30)
+        self.assertEqual(Items.objects.count(), 3)
+
+    def test_import_reaches_the_menu_snapshot(self):
+        before = menu_cache.get_menu_snapshot()
+
+        self.import_rows([{'name': 'Fries', 'price': '30', 'category': 'Burgers'}])
+
+        after = menu_cache.get_menu_snapshot()
+        self.assertNotEqual(after['version'], before['version'])
+        self.assertIn('Fries', [item['name'] for item in menu_cache.get_category_items(after, self.burgers.pk)])
+
+
+class MenuSearchTests(TestCase):
+    def test_results_link_to_their_category(self):
+        burgers = Category.objects.create(name='Burgers')
+        Items.objects.create(name='Veg Burger', description='', price=90, category=burgers)
+        Items.objects.create(name='Burger Sauce', description='', price=10)
+
+        results = {r['name']: r for r in self.client.get('/search/', {'q': 'burger'}).json()['results']}
+
+        self.assertEqual(results['Veg Burger']['url'], f'/category-items/{burgers.pk}')
+        self.assertIsNone(results['Burger Sauce']['url'])
+
+
+class OrderLifecycleTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.order = Order.objects.create(user=self.user, total_amount=250, razorpay_payment_id='pay_1')
+
+    def test_transition_moves_allowed_status_once(self):
+        self.assertTrue(order_lifecycle.transition(self.order.pk, 'done'))
+        self.assertFalse(order_lifecycle.transition(self.order.pk, 'done'))
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'done')
+        self.assertEqual(OrderEvent.objects.filter(order=self.order, kind='status_changed').count(), 1)
+
+    def test_done_order_cannot_be_cancelled(self):
+        order_lifecycle.transition(self.order.pk, 'done')
+
+        self.assertFalse(order_lifecycle.transition(self.order.pk, 'cancelled'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'done')
+        self.assertIsNone(self.order.refund_amount)
+        self.assertFalse(Job.objects.filter(name='refund_order').exists())
+
+    def test_cancel_sets_refund_and_queues_it(self):
+        self.assertTrue(order_lifecycle.transition(self.order.pk, 'cancelled'))
+
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.refund_amount, self.order.refund_status), (250, 'pending'))
+        self.assertTrue(Job.objects.filter(name='refund_order', payload={'order_id': self.order.pk}).exists())
+        self.assertTrue(OrderEvent.objects.filter(order=self.order, kind='cancelled').exists())
+
+    def test_order_without_payment_cannot_be_cancelled(self):
+        unpaid = Order.objects.create(user=self.user, total_amount=10)
+
+        self.assertFalse(order_lifecycle.transition(unpaid.pk, 'cancelled'))
+
+    def test_unreachable_status_is_invalid(self):
+        with self.assertRaises(order_lifecycle.InvalidTransition):
+            order_lifecycle.transition(self.order.pk, 'paid')
+
+    def test_bulk_transition_moves_only_allowed_orders(self):
+        done = [Order.objects.create(user=self.user, total_amount=10, status='done') for _ in range(3)]
+
+        moved = order_lifecycle.bulk_transition(Order.objects.all(), 'delivered')
+
+        self.assertEqual(sorted(moved), [order.pk for order in done])
+        self.assertEqual(Order.objects.filter(status='delivered').count(), 3)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'in_process')
+        self.assertEqual(OrderEvent.objects.filter(status='delivered').count(), 3)
+
+
+class OrderStreamTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.order = Order.objects.create(user=user, total_amount=250, razorpay_payment_id='pay_1')
+
+    def read_stream(self, **headers):
+        response = self.client.get('/order_list/stream/', headers=headers)
+        return b''.join(response.streaming_content).decode()
+
+    def test_wsgi_stream_sends_snapshot_and_closes(self):
+        body = self.read_stream()
+
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn('event: snapshot', body)
+
+    def test_wsgi_stream_resumes_from_last_event_id(self):
+        last = OrderEvent.objects.create(order=self.order, kind='created', status='in_process').pk
+        order_lifecycle.transition(self.order.pk, 'done')
+
+        body = self.read_stream(last_event_id=str(last))
+
+        self.assertNotIn('event: snapshot', body)
+        self.assertIn('"status": "done"', body)
+
+
+class OrderStatusViewTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.other = CustomUser.objects.create_user('ravi', 'ravi@example.com', 'pw')
+        self.staff = CustomUser.objects.create_user('kitchen', 'kitchen@example.com', 'pw', is_staff=True)
+        self.order = Order.objects.create(user=self.owner, total_amount=250, razorpay_payment_id='pay_1')
+
+    def client_for(self, user, csrf_checks=False):
+        client = Client(enforce_csrf_checks=csrf_checks)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def cancel(self, user, order_id, csrf_checks=False):
+        return self.client_for(user, csrf_checks).post('/cancel-order/', json.dumps({'order_id': order_id}),
+                                          content_type='application/json')
+
+    def test_cancel_requires_login(self):
+        response = self.cancel(None, self.order.pk)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'in_process')
+
+    def test_cancel_checks_csrf(self):
+        response = self.cancel(self.owner, self.order.pk, csrf_checks=True)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'in_process')
+
+    def test_cancel_only_own_order(self):
+        response = self.cancel(self.other, self.order.pk)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'in_process')
+
+    def test_owner_and_staff_can_cancel(self):
+        response = self.cancel(self.owner, self.order.pk)
+        self.assertEqual(response.json()['refund']['amount'], 250.0)
+
+        other_order = Order.objects.create(user=self.other, total_amount=90, razorpay_payment_id='pay_2')
+        response = self.cancel(self.staff, other_order.pk)
+        self.assertEqual(response.json()['status'], 'success')
+
+    def test_cancel_done_order_is_refused(self):
+        Order.objects.filter(pk=self.order.pk).update(status='done')
+
+        response = self.cancel(self.owner, self.order.pk)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.filter(name='refund_order').exists())
+
+    def test_cancel_rejects_bad_id(self):
+        self.assertEqual(self.cancel(self.owner, 'abc').status_code, 400)
+
+    def test_staff_can_update_any_order(self):
+        response = self.client_for(self.staff).post(f'/update-order-status/{self.order.pk}/', {'status': 'done'})
+
+        self.assertEqual(response.json()['new_status'], 'done')
+
+    def test_customer_limited_to_confirming_delivery(self):
+        client = self.client_for(self.owner)
+
+        response = client.post(f'/update-order-status/{self.order.pk}/', {'status': 'cancelled'})
+        self.assertEqual(response.status_code, 403)
+        response = client.post(f'/update-order-status/{self.order.pk}/', {'status': 'done'})
+        self.assertEqual(response.status_code, 403)
+
+        Order.objects.filter(pk=self.order.pk).update(status='on_way')
+        response = client.post(f'/update-order-status/{self.order.pk}/', {'status': 'delivered'})
+        self.assertEqual(response.json()['new_status'], 'delivered')
+
+    def test_customer_cannot_update_someone_elses_order(self):
+        Order.objects.filter(pk=self.order.pk).update(status='on_way')
+
+        response = self.client_for(self.other).post(f'/update-order-status/{self.order.pk}/', {'status': 'delivered'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class MaterializeOrderTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.other = CustomUser.objects.create_user('ravi', 'ravi@example.com', 'pw')
+        self.burger = Items.objects.create(name='Veg Burger', description='', price=90)
+        self.cola = Items.objects.create(name='Cola', description='', price=40)
+
+    def fill_cart(self, user):
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, menu_item=self.burger, quantity=2)
+        CartItem.objects.create(cart=cart, menu_item=self.cola, quantity=1)
+
+    def test_creates_order_from_cart(self):
+        self.fill_cart(self.user)
+
+        order, created = materialize_order(self.user, 'pay_1')
+
+        self.assertTrue(created)
+        self.assertEqual(order.total_amount, 220)
+        self.assertEqual(sorted(OrderItem.objects.filter(order=order).values_list('quantity', 'price')),
+                         [(1, 40), (2, 180)])
+        self.assertFalse(Cart.objects.filter(user=self.user, order__isnull=True).exists())
+        self.assertTrue(OrderEvent.objects.filter(order=order, kind='created').exists())
+
+    def test_repeated_payment_returns_same_order(self):
+        self.fill_cart(self.user)
+        order, _ = materialize_order(self.user, 'pay_1')
+        self.fill_cart(self.user)
+
+        again, created = materialize_order(self.user, 'pay_1')
+
+        self.assertFalse(created)
+        self.assertEqual(again.pk, order.pk)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_no_cart(self):
+        with self.assertRaises(Cart.DoesNotExist):
+            materialize_order(self.user, 'pay_1')
+
+    def test_payment_of_another_user(self):
+        self.fill_cart(self.other)
+        materialize_order(self.other, 'pay_1')
+        self.fill_cart(self.user)
+
+        with self.assertRaises(PaymentAlreadyUsed):
+            materialize_order(self.user, 'pay_1')
+        # The cart is left for a real payment
+        self.assertTrue(Cart.objects.filter(user=self.user, order__isnull=True).exists())
+
+    def test_payment_success_reports_conflict(self):
+        self.fill_cart(self.other)
+        materialize_order(self.other, 'pay_1')
+        self.fill_cart(self.user)
+        client = Client()
+        client.force_login(self.user)
+
+        response = client.post('/payment-success/', {'razorpay_payment_id': 'pay_1'})
+
+        self.assertEqual(response.status_code, 409)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.burgers = Category.objects.create(name='Burgers')
+        self.burger = Items.objects.create(name='Veg Burger', description='', price=90, category=self.burgers)
+        self.cola = Items.objects.create(name='Cola', description='', price=40)
+
+    def place_order(self, payment_id):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, menu_item=self.burger, quantity=2)
+        CartItem.objects.create(cart=cart, menu_item=self.cola, quantity=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            return materialize_order(self.user, payment_id)[0]
+
+    def settle_events(self):
+        OrderEvent.objects.update(created_at=timezone.now() - rollups.SETTLE - timedelta(seconds=1))
+
+    def test_totals_after_create_and_cancel(self):
+        first = self.place_order('pay_1')
+        self.place_order('pay_2')
+        order_lifecycle.transition(first.pk, 'cancelled')
+        self.settle_events()
+
+        rollups.catch_up()
+
+        for period in ('hour', 'day'):
+            totals = SalesRollup.objects.get(period=period)
+            self.assertEqual((totals.orders, totals.revenue, totals.items_sold), (2, 440, 6))
+            self.assertEqual((totals.cancellations, totals.refunds), (1, 220))
+        burger = ProductSalesRollup.objects.get(period='day', product=self.burger)
+        self.assertEqual((burger.quantity, burger.revenue, burger.cancelled_quantity), (4, 360, 2))
+        self.assertEqual(burger.category_id, self.burgers.pk)
+
+    def test_unsettled_events_wait(self):
+        self.place_order('pay_1')
+
+        self.assertEqual(rollups.update_rollups(), 0)
+        self.assertFalse(SalesRollup.objects.exists())
+
+    def test_one_waiting_job_per_burst(self):
+        for n in range(3):
+            self.place_order(f'pay_{n}')
+
+        self.assertEqual(Job.objects.filter(name='update_sales_rollups', status='pending').count(), 1)
+
+    def test_job_requeues_itself_for_unsettled_events(self):
+        self.place_order('pay_1')
+        Job.objects.update(status='running')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rollups.catch_up()
+
+        self.assertTrue(Job.objects.filter(name='update_sales_rollups', status='pending').exists())
+
+    def test_job_due_before_the_event_settles_gets_a_follow_up(self):
+        # A waiting job that may already be past its last look at the events
+        jobs.enqueue('update_sales_rollups')
+
+        self.place_order('pay_1')
+
+        waiting = Job.objects.filter(name='update_sales_rollups', status='pending')
+        self.assertEqual(waiting.count(), 2)
+        latest = waiting.order_by('-run_after').first()
+        self.assertGreaterEqual(latest.run_after, OrderEvent.objects.get().created_at + rollups.SETTLE)
+
+    def test_backfill_matches_incremental(self):
+        first = self.place_order('pay_1')
+        self.place_order('pay_2')
+        order_lifecycle.transition(first.pk, 'cancelled')
+        self.settle_events()
+        rollups.catch_up()
+        incremental = list(SalesRollup.objects.order_by('period').values_list(
+            'period', 'orders', 'revenue', 'items_sold', 'cancellations', 'refunds'))
+
+        call_command('backfill_sales_rollups', stdout=io.StringIO())
+
+        self.assertEqual(list(SalesRollup.objects.order_by('period').values_list(
+            'period', 'orders', 'revenue', 'items_sold', 'cancellations', 'refunds')), incremental)
+
+
+class KeysetPageTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.orders = [Order.objects.create(user=user, total_amount=n) for n in range(7)]
+        # Two pairs share a timestamp, so the id has to break the tie
+        base = timezone.now()
+        for n, order in enumerate(self.orders):
+            Order.objects.filter(pk=order.pk).update(created_at=base - timedelta(minutes=n // 2))
+
+    def test_walks_all_rows_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            page = keyset_page(Order.objects.all(), cursor, per_page=3)
+            seen.extend(order.pk for order in page.object_list)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_last_page_has_no_cursor(self):
+        page = keyset_page(Order.objects.all(), per_page=10)
+
+        self.assertFalse(page.has_next)
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(len(page.object_list), 7)
+
+    def test_bad_cursor_starts_over(self):
+        page = keyset_page(Order.objects.all(), 'not-a-cursor', per_page=3)
+
+        self.assertEqual(len(page.object_list), 3)
+        self.assertTrue(page.has_next)
+
+
+class CartBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.burger = Items.objects.create(name='Veg Burger', description='', price=90)
+        self.cola = Items.objects.create(name='Cola', description='', price=40)
+        self.client.force_login(self.user)
+
+    def post(self, operations):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/cart/batch/', {'operations': operations}, content_type='application/json')
+
+    def test_applies_net_deltas(self):
+        response = self.post([
+            {'item_id': self.burger.pk, 'delta': 1},
+            {'item_id': self.burger.pk, 'delta': 2},
+            {'item_id': self.cola.pk, 'delta': 1},
+            {'item_id': self.cola.pk, 'delta': -1},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_quantity'], 3)
+        self.assertEqual(response.json()['total_price'], '270.00')
+        cart = Cart.objects.get(user=self.user, order__isnull=True)
+        self.assertEqual(list(cart.cart_items.values_list('menu_item_id', 'quantity')), [(self.burger.pk, 3)])
+
+    def test_quantity_never_goes_below_zero(self):
+        self.post([{'item_id': self.burger.pk, 'delta': 2}])
+
+        response = self.post([{'item_id': self.burger.pk, 'delta': -5}])
+
+        self.assertEqual(response.json()['total_quantity'], 0)
+        self.assertFalse(CartItem.objects.filter(menu_item=self.burger).exists())
+
+    def test_rejects_unknown_items_without_changes(self):
+        response = self.post([{'item_id': self.burger.pk, 'delta': 1}, {'item_id': 999999, 'delta': 1}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_rejects_malformed_operations(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post([{'item_id': 'x', 'delta': 1}]).status_code, 400)
+
+    def test_cached_quantities_are_rebuilt_after_a_write(self):
+        self.post([{'item_id': self.burger.pk, 'delta': 1}])
+        self.assertEqual(get_cart_quantities(self.user), {self.burger.pk: 1})
+        # Written by another request, e.g. the cart page in a second tab
+        CartItem.objects.create(cart=Cart.objects.get(user=self.user), menu_item=self.cola, quantity=2)
+
+        response = self.post([{'item_id': self.burger.pk, 'delta': 1}])
+
+        self.assertEqual(get_cart_quantities(self.user), {self.burger.pk: 2, self.cola.pk: 2})
+        self.assertEqual(response.json()['total_quantity'], 4)
+
+    def test_requires_login(self):
+        self.client.logout()
+
+        self.assertEqual(self.post([{'item_id': self.burger.pk, 'delta': 1}]).status_code, 403)
+
+    @override_settings(STORAGES={**settings.STORAGES, 'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+    def test_home_page_only_wires_batch_endpoint(self):
+        Category.objects.create(name='Burgers')
+
+        html = self.client.get('/').content.decode()
+
+        self.assertIn('/api/cart/batch/', html)
+        for old in ('/cart/toggle/', '/toggle-cart-item/', '/cart/update-quantity/'):
+            self.assertNotIn(old, html)
@@ -3,7 +3,8 @@ from django.contrib import admin
 from django.urls import path, include
 from .views import HomeView
 from django.contrib.auth import views as auth_views
-from . import views
+from . import views, api
+from .metrics import metrics_view
 urlpatterns = [
     path("", HomeView.as_view(), name="home"),
     # path('add_to_cart/<int:item_id>/', views.add_to_cart, name='add_to_cart'),
@@ -14,12 +15,20 @@ urlpatterns = [
     path('cart/update-quantity/', views.update_cart_quantity, name='update_cart_quantity'),
     path('cart/toggle/', views.toggle_cart_item, name='toggle_cart_item'),
     path("order_list/", views.order_list, name="order_list"),
+    path("order_list/stream/", views.order_stream, name="order_stream"),
     path('update-order-status/<int:order_id>/', views.update_order_status, name='update_order_status'),
     path('cancel-order/', views.cancel_order, name='cancel_order'),
     path('orders/receipt/<int:order_id>/', views.order_receipt, name='order_receipt'),
     path('clear-cart/', views.clear_cart, name='clear_cart'),
     path("my-orders/", views.my_orders , name="my_orders"),
     path("category-items/<int:category_id>", views.category, name="category_items"),
+    path("search/", views.menu_search, name="menu_search"),
+    path("api/catalog/", api.catalog, name="api_catalog"),
+    path("api/catalog/categories/<int:category_id>/", api.catalog_category, name="api_catalog_category"),
+    path("api/cart/", api.cart, name="api_cart"),
+    path("api/cart/batch/", api.cart_batch, name="api_cart_batch"),
+    path("api/orders/", api.orders, name="api_orders"),
+    path("metrics/", metrics_view, name="metrics"),
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import View
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
@@ -10,6 +11,7 @@ from .models import Items, Cart, CartItem, Order, OrderItem, Category
 from django.core.paginator import Paginator
 import json
 import traceback
+from decimal import Decimal
 from django.urls import reverse
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login as auth_login, get_backends
@@ -18,6 +20,14 @@ from django.contrib.auth.views import PasswordResetView
 from django.core.mail import send_mail
 from django.utils.http import url_has_allowed_host_and_scheme
 from users.forms import LoginForm , RegisterForm
+from .menu_cache import get_menu_snapshot, get_category, get_category_items
+from .cart_state import get_cart_quantities, invalidate_cart_state
+from .orders import PaymentAlreadyUsed, materialize_order
+from .payments import cart_fingerprint, create_order
+from . import order_events, order_lifecycle
+from .order_events import board_orders
+from .pagination import keyset_page
+from .search import search_menu
 
 # Helper to get or create the active cart (order=None) for a user
 def get_or_create_active_cart(user):
@@ -29,15 +39,10 @@ def get_or_create_active_cart(user):
 
 class HomeView(View):
     def get(self, request):
-        items = Items.objects.all()
-        category= Category.objects.all()
-        cart_quantities = {}
-
-        if request.user.is_authenticated:
-            cart = Cart.objects.filter(user=request.user, order__isnull=True).first()
-            if cart:
-                cart_items = CartItem.objects.filter(cart=cart)
-                cart_quantities = {ci.menu_item.id: ci.quantity for ci in cart_items}
+        menu = get_menu_snapshot()
+        items = menu['items']
+        category = menu['categories']
+        cart_quantities = get_cart_quantities(request.user)
 
         context = {
             'items': items,
@@ -49,28 +54,24 @@ class HomeView(View):
 @login_required
 def view_cart(request):
     cart = Cart.objects.filter(user=request.user, order__isnull=True).first()
-    items_qs = cart.cart_items.select_related('menu_item') if cart else []
+    items_qs = cart.cart_items.select_related('menu_item').order_by('id') if cart else []
 
     # Paginate cart items
     paginator = Paginator(items_qs, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    total_price = sum(item.quantity * item.menu_item.price for item in items_qs)
-    total_quantity = sum(item.quantity for item in items_qs)
+    totals = cart.totals() if cart else {'total_price': Decimal('0.00'), 'total_quantity': 0}
+    total_price = totals['total_price']
+    total_quantity = totals['total_quantity']
 
     total_price_in_paise = int(total_price * 100)
 
     # Only proceed if total is ≥ ₹1
     razorpay_order = None
     if total_price_in_paise >= 100:
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        order_data = {
-            'amount': total_price_in_paise,
-            'currency': 'INR',
-            'payment_capture': '1'
-        }
-        razorpay_order = client.order.create(data=order_data)
+        fingerprint = cart_fingerprint(cart, get_cart_quantities(request.user))
+        razorpay_order = create_order(total_price_in_paise, fingerprint)
 
     context = {
         'items': page_obj,
@@ -126,6 +127,8 @@ def toggle_cart_item(request):
             final_quantity = 0
             item_is_in_cart = False
 
+        invalidate_cart_state(request.user)
+
         return JsonResponse({
             'success': True,
             'quantity': final_quantity,
@@ -149,6 +152,7 @@ def add_to_cart(request, item_id):
     if not item_was_created_in_cart:
         cart_item.quantity += 1
         cart_item.save()
+    invalidate_cart_state(request.user)
 
     return redirect('view_cart')
 
@@ -160,13 +164,8 @@ def checkout_cart(request):
         return JsonResponse({'error': 'Cart is empty'}, status=400)
 
     total_price = cart.total_price()
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-    order_data = {
-        'amount': int(total_price * 100),
-        'currency': 'INR',
-        'payment_capture': '1'
-    }
-    razorpay_order = client.order.create(data=order_data)
+    fingerprint = cart_fingerprint(cart, get_cart_quantities(request.user))
+    razorpay_order = create_order(int(total_price * 100), fingerprint)
 
     return JsonResponse({
         'razorpay_order_id': razorpay_order['id'],
@@ -182,33 +181,15 @@ def checkout_cart(request):
 @login_required
 def payment_success(request):
     if request.method == "POST":
-        data = request.POST
-        cart = Cart.objects.filter(user=request.user, order__isnull=True).first()
-        if not cart:
+        try:
+            order, created = materialize_order(request.user, request.POST.get("razorpay_payment_id"))
+        except Cart.DoesNotExist:
             return JsonResponse({'error': 'No cart found'}, status=400)
+        except PaymentAlreadyUsed:
+            return JsonResponse({'error': 'This payment belongs to another order'}, status=409)
 
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=cart.total_price(),
-            status='in_process',
-            status_pay='PAID',
-            razorpay_payment_id=data.get("razorpay_payment_id")
-        )
-
-        # ✅ Create OrderItem entries from cart items
-        for item in cart.cart_items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=item.menu_item,
-                quantity=item.quantity,
-                price=item.total_price(),
-            )
-
-        cart.order = order
-        cart.save()
-
-        cart.delete()  # Clear the cart after successful payment
-        receipt_url = reverse('order_receipt', args=[order.order_number])
+        invalidate_cart_state(request.user)
+        receipt_url = reverse('order_receipt', args=[order.id])
         return JsonResponse({'success': True, 'order_id': order.order_number, 'redirect_url': receipt_url})
 
 
@@ -226,7 +207,7 @@ def update_cart_quantity(request):
     action = request.POST.get('action')
 
     try:
-        cart_item = cart.cart_items.get(menu_item_id=item_id)
+        cart_item = cart.cart_items.select_related('menu_item').get(menu_item_id=item_id)
     except CartItem.DoesNotExist:
         return JsonResponse({'error': 'Item not found in cart'}, status=404)
 
@@ -237,9 +218,11 @@ def update_cart_quantity(request):
             cart_item.quantity -= 1
         else:
             cart_item.delete()
-            return JsonResponse({'removed': True})
+            invalidate_cart_state(request.user)
+            return JsonResponse({'removed': True, 'cart_total': float(cart.total_price())})
 
-    cart_item.save()
+    cart_item.save(update_fields=['quantity'])
+    invalidate_cart_state(request.user)
 
     total_price = cart.total_price()
 
@@ -251,93 +234,105 @@ def update_cart_quantity(request):
 
 
 def order_list(request):
-    orders=Order.objects.filter(status='in_process').order_by('-created_at')
+    cursor = request.GET.get('cursor')
+    page = keyset_page(board_orders(), cursor, per_page=order_events.BOARD_PAGE_SIZE)
     context={
-        'order':orders,
+        'order': page.object_list,
+        'page': page,
+        'live': not cursor,  # only the first page follows the live stream
     }
     return render(request, 'order_list.html', context)
 
 
 
 
+def order_stream(request):
+    # Server-Sent Events for the kitchen board: a snapshot, then order events
+    last_event_id = request.headers.get('Last-Event-ID')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    if isinstance(request, ASGIRequest):
+        content = order_events.stream(last_event_id)
+    else:
+        content = order_events.stream_sync(last_event_id)
+
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def transition_refused(order_id, status, **filters):
+    # Only reached when the conditional UPDATE matched nothing; work out why
+    order = Order.objects.filter(id=order_id, **filters).only('status', 'razorpay_payment_id').first()
+    if order is None:
+        return JsonResponse({'status': 'error', 'message': 'Order not found.'}, status=404)
+    if status == 'cancelled' and not order.razorpay_payment_id:
+        return JsonResponse({'status': 'error', 'message': 'No payment ID found for this order.'}, status=400)
+    if order.status == status:
+        return JsonResponse({'status': 'error', 'message': f'Order is already {order.get_status_display().lower()}.'}, status=400)
+    target = dict(Order.ORDER_STATUS)[status]
+    return JsonResponse({
+        'status': 'error',
+        'message': f"Orders that are {order.get_status_display().lower()} can't be moved to {target.lower()}.",
+    }, status=400)
+
+
 @login_required
 @require_POST
 def update_order_status(request, order_id):
+    new_status = request.POST.get('status')
+    allowed_statuses = [choice[0] for choice in Order.ORDER_STATUS]
+    if new_status not in allowed_statuses:
+        return JsonResponse({'status': 'error', 'message': 'Invalid status'}, status=400)
+
+    # Kitchen staff (the order board) move any order. Customers only their
+    # own, and only to the statuses they're meant to set
+    if request.user.is_staff:
+        filters = {}
+    elif new_status in order_lifecycle.CUSTOMER_TARGETS:
+        filters = {'user': request.user}
+    else:
+        return JsonResponse({'status': 'error', 'message': "You can't set that status."}, status=403)
     try:
-        new_status = request.POST.get('status')
-        order = Order.objects.get(id=order_id, user=request.user)
-
-        allowed_statuses = [choice[0] for choice in Order.ORDER_STATUS]
-        if new_status not in allowed_statuses:
-            return JsonResponse({'status': 'error', 'message': 'Invalid status'}, status=400)
+        if not order_lifecycle.transition(order_id, new_status, **filters):
+            return transition_refused(order_id, new_status, **filters)
+    except order_lifecycle.InvalidTransition as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', 'new_status': new_status})
 
-        if new_status == 'done' and order.status != 'in_process':
-            return JsonResponse({
-                'status': 'error',
-                'message': 'Only orders in process can be marked as done.'
-            }, status=400)
 
-        order.status = new_status
-        order.save()
-        return JsonResponse({'status': 'success', 'new_status': order.status})
 
-    except Order.DoesNotExist:
-        return JsonResponse({'status': 'error', 'message': 'Order not found'}, status=404)
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
-
-
-
-@csrf_exempt
+@login_required
 @require_POST
 def cancel_order(request):
     try:
         data = json.loads(request.body)
-        order_id = data.get("order_id")
-
-        if not order_id:
-            return JsonResponse({"status": "error", "message": "Order ID is required."}, status=400)
-
-        order = Order.objects.get(id=order_id)
-
-        if not order.razorpay_payment_id:
-            return JsonResponse({"status": "error", "message": "No payment ID found for this order."}, status=400)
-
-        # Use total_amount for refund
-        refund_amount = float(order.total_amount)
-        refund_amount_paise = int(refund_amount * 100)
-
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
-        refund = client.payment.refund(order.razorpay_payment_id, {
-            "amount": refund_amount_paise
-        })
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON."}, status=400)
 
-        # Update order with refund info
-        order.status = 'cancelled'
-        order.refund_id = refund.get("id")
-        order.refund_amount = refund_amount_paise / 100
-        order.refund_status = refund.get("status")
-        order.save()
+    order_id = data.get("order_id") if isinstance(data, dict) else None
+    if not order_id:
+        return JsonResponse({"status": "error", "message": "Order ID is required."}, status=400)
+    if not str(order_id).isdigit():
+        return JsonResponse({"status": "error", "message": "Invalid order ID."}, status=400)
 
-        return JsonResponse({
-            "status": "success",
-            "message": "Order cancelled and refunded (full amount).",
-            "refund": {
-                "refund_id": order.refund_id,
-                "amount": order.refund_amount,
-                "status": order.refund_status
-            }
-        })
+    # Staff cancel from the order board; customers only their own orders
+    filters = {} if request.user.is_staff else {'user': request.user}
+    # Refunds the total amount; the gateway call runs in the job worker
+    if not order_lifecycle.transition(order_id, 'cancelled', **filters):
+        return transition_refused(order_id, 'cancelled', **filters)
 
-    except Order.DoesNotExist:
-        return JsonResponse({"status": "error", "message": "Order not found."}, status=404)
-    except json.JSONDecodeError:
-        return JsonResponse({"status": "error", "message": "Invalid JSON."}, status=400)
-    except razorpay.errors.BadRequestError as e:
-        return JsonResponse({"status": "error", "message": f"Refund failed: {str(e)}"}, status=400)
-    except Exception as e:
-        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+    order = Order.objects.only('refund_id', 'refund_amount', 'refund_status').get(id=order_id)
+    return JsonResponse({
+        "status": "success",
+        "message": "Order cancelled. Refund (full amount) is pending.",
+        "refund": {
+            "refund_id": order.refund_id,
+            "amount": float(order.refund_amount),
+            "status": order.refund_status
+        }
+    })
     
 
 
@@ -366,6 +361,7 @@ def clear_cart(request):
     if cart:
         cart.cart_items.all().delete()
         cart.delete()
+        invalidate_cart_state(request.user)
         return JsonResponse({'success': True})
     return JsonResponse({'success': False, 'message': 'No active cart found'})
 
@@ -373,22 +369,21 @@ def my_orders(request):
     if not request.user.is_authenticated:
         return redirect('login')
 
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    page = keyset_page(Order.objects.filter(user=request.user), request.GET.get('cursor'))
     context = {
-        'orders': orders,
+        'orders': page.object_list,
+        'page': page,
     }
     return render(request, 'my_orders.html', context)
 
 def category(request, category_id):
-    category = get_object_or_404(Category, id=category_id)
-    items = Items.objects.filter(category=category)
+    menu = get_menu_snapshot()
+    category = get_category(menu, category_id)
+    if category is None:
+        raise Http404("No Category matches the given query.")
+    items = get_category_items(menu, category_id)
 
-    cart_quantities = {}
-    if request.user.is_authenticated:
-        cart = Cart.objects.filter(user=request.user, order__isnull=True).first()
-        if cart:
-            cart_items = CartItem.objects.filter(cart=cart)
-            cart_quantities = {ci.menu_item.id: ci.quantity for ci in cart_items}
+    cart_quantities = get_cart_quantities(request.user)
 
     context = {
         'items': items,
@@ -398,6 +393,32 @@ def category(request, category_id):
     return render(request, 'category.html', context)
 
 
+SEARCH_LIMIT = 50
+
+def menu_search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), SEARCH_LIMIT)
+    except ValueError:
+        limit = 10
+
+    results = [
+        {
+            'id': item['id'],
+            'name': item['name'],
+            'short_description': item['short_description'],
+            'price': str(item['price']),
+            'image_url': item['image_url'],
+            'category_id': item['category_id'],
+            'category': item['category'],
+            'url': reverse('category_items', args=[item['category_id']]) if item['category_id'] else None,
+            'score': score,
+        }
+        for item, score in search_menu(query, limit)
+    ]
+    return JsonResponse({'query': query, 'results': results})
+
+
 
 def login_view(request):
     next_url = request.GET.get('next') or request.POST.get('next')
@@ -406,11 +427,7 @@ def login_view(request):
         form = LoginForm(request=request, data=request.POST)
         if form.is_valid():
             user = form.get_user()
-            auth_login(request, user)
-
-            request.session.save()  # Ensure session_key is created
-            user.current_session_key = request.session.session_key
-            user.save(update_fields=['current_session_key'])
+            auth_login(request, user)  # users.signals records the session key
 
             if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
                 return redirect(next_url)
@@ -0,0 +1,53 @@
+// Collects +/- taps per item and sends them to the batch cart endpoint in a
+// single request once the user stops tapping. Requests go out one at a time,
+// in order; onState gets the cart returned by the server.
+class CartBatch {
+    constructor(url, csrfToken, onState, delay = 300) {
+        this.url = url;
+        this.csrfToken = csrfToken;
+        this.onState = onState;
+        this.delay = delay;
+        this.pending = new Map();
+        this.timer = null;
+        this.inFlight = Promise.resolve();
+    }
+
+    queue(itemId, delta) {
+        itemId = Number(itemId);
+        this.pending.set(itemId, (this.pending.get(itemId) || 0) + delta);
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.flush(), this.delay);
+    }
+
+    isPending(itemId) {
+        return this.pending.has(Number(itemId));
+    }
+
+    flush() {
+        clearTimeout(this.timer);
+        const operations = [...this.pending]
+            .filter(([, delta]) => delta !== 0)
+            .map(([item_id, delta]) => ({ item_id, delta }));
+        this.pending.clear();
+        if (!operations.length) return this.inFlight;
+
+        this.inFlight = this.inFlight.then(() => fetch(this.url, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': this.csrfToken,
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ operations }),
+            keepalive: true,
+        })
+        .then(res => res.json().then(data => ({ ok: res.ok, data })))
+        .then(({ ok, data }) => {
+            if (ok) {
+                this.onState(data);
+            } else {
+                alert(data.error || data.detail || "Something went wrong.");
+            }
+        }));
+        return this.inFlight;
+    }
+}
@@ -1,16 +1,85 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models.functions import Lower
 
 UserModel = get_user_model()
 
+LOGIN_ATTEMPTS_KEY = 'login:attempts:{}:{}'
+
+
 class EmailOrUsernameModelBackend(ModelBackend):
+    """Log in with either email or username.
+
+    The identifier picks a single indexed lookup (LOWER(email) when it
+    contains '@', LOWER(username) otherwise), misses still pay for one
+    password hash so timing doesn't reveal which accounts exist, and a
+    cache-backed counter per identifier and per client IP (read from
+    LOGIN_ATTEMPTS_IP_HEADER) rejects bursts before any hashing is done.
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = UserModel.objects.get(Q(username__iexact=username) | Q(email__iexact=username))
-        except UserModel.DoesNotExist:
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        keys = self.attempt_keys(request, username)
+        if self.is_throttled(keys):
+            # Stops the remaining backends as well
+            raise PermissionDenied("Too many login attempts. Try again later.")
+
+        user = self.get_user_by_identifier(username)
+        if user is None:
+            UserModel().set_password(password)
+            self.record_failure(keys)
             return None
 
         if user.check_password(password) and self.user_can_authenticate(user):
+            cache.delete(keys['identifier'])
             return user
+
+        self.record_failure(keys)
         return None
+
+    def get_user_by_identifier(self, identifier):
+        field = 'email' if '@' in identifier else 'username'
+        try:
+            return UserModel._default_manager.alias(lookup=Lower(field)).get(lookup=identifier.lower())
+        except (UserModel.DoesNotExist, UserModel.MultipleObjectsReturned):
+            return None
+
+    def attempt_keys(self, request, identifier):
+        digest = hashlib.sha256(identifier.lower().encode()).hexdigest()
+        keys = {'identifier': LOGIN_ATTEMPTS_KEY.format('id', digest)}
+        ip = self.client_ip(request)
+        if ip:
+            keys['ip'] = LOGIN_ATTEMPTS_KEY.format('ip', ip)
+        return keys
+
+    def client_ip(self, request):
+        header = settings.LOGIN_ATTEMPTS_IP_HEADER
+        if request is None or not header:
+            return None
+        # In a list like X-Forwarded-For only the last entry, added by our
+        # own proxy, can't be made up by the client
+        return request.META.get(header, '').split(',')[-1].strip() or None
+
+    def is_throttled(self, keys):
+        counts = cache.get_many(keys.values())
+        if counts.get(keys['identifier'], 0) >= settings.LOGIN_ATTEMPTS_PER_IDENTIFIER:
+            return True
+        return 'ip' in keys and counts.get(keys['ip'], 0) >= settings.LOGIN_ATTEMPTS_PER_IP
+
+    def record_failure(self, keys):
+        for key in keys.values():
+            cache.add(key, 0, settings.LOGIN_ATTEMPTS_WINDOW)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.set(key, 1, settings.LOGIN_ATTEMPTS_WINDOW)
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, _get_user_session_key, load_backend,
+)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .sessions import get_cached_user, is_current_session
+
+
+def get_user(request):
+    # Same checks as django.contrib.auth.get_user, with the user row cached
+    try:
+        user_id = _get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    user = get_cached_user(user_id, load_backend(backend_path).get_user)
+    if user is None:
+        return AnonymousUser()
+
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    session_auth_hash = user.get_session_auth_hash()
+    if not (session_hash and constant_time_compare(session_hash, session_auth_hash)):
+        if session_hash and any(
+            constant_time_compare(session_hash, fallback_auth_hash)
+            for fallback_auth_hash in user.get_session_auth_fallback_hash()
+        ):
+            request.session.cycle_key()
+            request.session[HASH_SESSION_KEY] = session_auth_hash
+        else:
+            request.session.flush()
+            return AnonymousUser()
+
+    if settings.SINGLE_SESSION_PER_USER:
+        # A newer login elsewhere replaces this session
+        if not is_current_session(user, request.session.session_key):
+            request.session.flush()
+            return AnonymousUser()
+
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser,BaseUserManager, PermissionsMixin
+from django.db.models.functions import Lower
 from django.db.models.signals import post_save
 from django.utils import timezone
 from datetime import date, timedelta
@@ -48,6 +49,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta:
+        indexes = [
+            # Case-insensitive login lookups (users.backend)
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+            models.Index(Lower('username'), name='users_username_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.email})"
 
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+
+from .models import CustomUser
+
+# Cached user rows for the auth middleware, dropped on every save/delete.
+# The drop only reaches processes sharing the cache; with a per-process cache
+# a deactivated user stays signed in elsewhere until the entry expires.
+USER_CACHE_KEY = 'auth:user:{}'
+USER_CACHE_TIMEOUT = 60
+
+# The session a user last logged in with; older sessions are logged out.
+# CustomUser.current_session_key, written in the login request, is the
+# source of truth and the cache only saves re-reading it. Entries expire, so
+# with a per-process cache a login handled by another worker still logs the
+# old session out here within SESSION_CACHE_TIMEOUT.
+SESSION_CACHE_KEY = 'auth:session:{}'
+SESSION_CACHE_TIMEOUT = 60
+
+
+def get_cached_user(user_id, loader):
+    key = USER_CACHE_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = loader(user_id)
+        if user is not None:
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def forget_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+def remember_session(user, session_key):
+    # Just this column, in the login request; no save() and its signals
+    CustomUser.objects.filter(pk=user.pk).update(current_session_key=session_key)
+    user.current_session_key = session_key
+    cache.set(SESSION_CACHE_KEY.format(user.pk), session_key, SESSION_CACHE_TIMEOUT)
+
+
+def is_current_session(user, session_key):
+    """False only when the user has since logged in with another session."""
+    key = SESSION_CACHE_KEY.format(user.pk)
+    latest = cache.get(key)
+    if latest is None or latest not in ('', session_key):
+        # Nothing cached, or a different session: ask the column before
+        # logging anyone out
+        latest = CustomUser.objects.filter(pk=user.pk).values_list('current_session_key', flat=True).first() or ''
+        cache.set(key, latest, SESSION_CACHE_TIMEOUT)
+    return latest in ('', session_key)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .sessions import forget_user, remember_session
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_in)
+def record_login_session(sender, request, user, **kwargs):
+    if not settings.SINGLE_SESSION_PER_USER or request is None:
+        return
+    if request.session.session_key is None:
+        # login() flushed a session that belonged to another user
+        request.session.save()
+    remember_session(user, request.session.session_key)
@@ -1,3 +1,118 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from .backend import EmailOrUsernameModelBackend
+from .models import CustomUser
+from .sessions import SESSION_CACHE_KEY
+
+
+class SingleSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('asha', 'asha@example.com', 'pw')
+        self.first = Client()
+        self.first.force_login(self.user)
+        self.second = Client()
+        self.second.force_login(self.user)
+
+    def logged_in(self, client):
+        return client.get('/api/cart/').status_code == 200
+
+    def test_login_writes_session_key(self):
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.current_session_key, self.second.session.session_key)
+
+    def test_newer_login_replaces_older_session(self):
+        self.assertTrue(self.logged_in(self.second))
+        self.assertFalse(self.logged_in(self.first))
+
+    def test_empty_cache_uses_column(self):
+        # A restarted worker, or one that didn't handle the login
+        cache.clear()
+
+        self.assertFalse(self.logged_in(self.first))
+        self.assertTrue(self.logged_in(self.second))
+
+    def test_stale_cache_does_not_log_out_new_session(self):
+        # A worker that still has the first login cached
+        cache.set(SESSION_CACHE_KEY.format(self.user.pk), self.first.session.session_key)
+
+        self.assertTrue(self.logged_in(self.second))
+
+    def test_deactivated_user_is_logged_out(self):
+        self.assertTrue(self.logged_in(self.second))
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertFalse(self.logged_in(self.second))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                   LOGIN_ATTEMPTS_PER_IDENTIFIER=3, LOGIN_ATTEMPTS_PER_IP=5)
+class LoginBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.backend = EmailOrUsernameModelBackend()
+        self.user = CustomUser.objects.create_user('asha', 'Asha@Example.com', 'pw')
+
+    def login(self, identifier, password, **meta):
+        request = RequestFactory().post('/login/', REMOTE_ADDR='10.0.0.1', **meta)
+        return self.backend.authenticate(request, username=identifier, password=password)
+
+    def test_username_or_email_any_case(self):
+        self.assertEqual(self.login('ASHA', 'pw'), self.user)
+        self.assertEqual(self.login('asha@example.com', 'pw'), self.user)
+
+    def test_identifier_with_at_only_matches_email(self):
+        CustomUser.objects.create_user('ravi@example.com', 'ravi@elsewhere.com', 'pw')
+
+        self.assertIsNone(self.login('ravi@example.com', 'pw'))
+
+    def test_unknown_user_still_hashes_a_password(self):
+        with mock.patch.object(CustomUser, 'set_password') as set_password:
+            self.assertIsNone(self.login('nobody', 'pw'))
+
+        set_password.assert_called_once_with('pw')
+
+    def test_identifier_throttled_after_failures(self):
+        for _ in range(3):
+            self.assertIsNone(self.login('asha', 'wrong'))
+
+        with self.assertRaises(PermissionDenied):
+            self.login('asha', 'pw')
+
+    def test_success_resets_identifier_count(self):
+        self.login('asha', 'wrong')
+        self.login('asha', 'wrong')
+        self.login('asha', 'pw')
+
+        self.assertIsNone(self.login('asha', 'wrong'))
+        self.assertEqual(self.login('asha', 'pw'), self.user)
+
+    def test_ip_throttled_across_identifiers(self):
+        for n in range(5):
+            self.login(f'guess{n}', 'wrong')
+
+        with self.assertRaises(PermissionDenied):
+            self.login('asha', 'pw')
+
+    @override_settings(LOGIN_ATTEMPTS_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_ip_read_from_proxy_header(self):
+        for n in range(5):
+            self.login(f'guess{n}', 'wrong', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.9')
+
+        # Same proxy address, different client
+        self.assertEqual(self.login('asha', 'pw', HTTP_X_FORWARDED_FOR='198.51.100.7'), self.user)
+        with self.assertRaises(PermissionDenied):
+            self.login('asha', 'pw', HTTP_X_FORWARDED_FOR='5.6.7.8, 203.0.113.9')
+
+    @override_settings(LOGIN_ATTEMPTS_IP_HEADER='')
+    def test_ip_limit_can_be_turned_off(self):
+        for n in range(5):
+            self.login(f'guess{n}', 'wrong')
+
+        self.assertEqual(self.login('asha', 'pw'), self.user)